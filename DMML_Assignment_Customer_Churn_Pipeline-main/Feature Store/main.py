@@ -1,17 +1,17 @@
 import datetime
-from os import times
 
 import pandas as pd
-from pyarrow import timestamp
 
+# Run from this folder with the repository root on PYTHONPATH (see Readme.md):
+#   cd "Feature Store" && PYTHONPATH=.. python main.py
 from utils.retriver import  CustomerChurnFeatures
 
 
-source_path = "../Dataset/Processed Data/processed_data.csv"
+source_path = "../Dataset/Processed Data/processed_data.parquet"
 
 
 # if __name__ == "__main__":
-#     customer_ids = pd.read_csv(source_path)["customerID"].to_list()
+#     customer_ids = pd.read_parquet(source_path, columns=["customerID"])["customerID"].to_list()
 #
 #     customer_churn_features = CustomerChurnFeatures("./")
 #     df = customer_churn_features.load(source_path)
@@ -22,3 +22,45 @@ source_path = "../Dataset/Processed Data/processed_data.csv"
 #     })
 #     vector = customer_churn_features.retrieve(entity_df)
 #     print(vector)
+#
+#     # Same rows through the local sharded point-in-time join
+#     local_vector = customer_churn_features.retrieve(entity_df, engine="local")
+#     print(local_vector)
+#     # Both engines must agree on this sample, the local one is only a faster path
+#     assert customer_churn_features.check_parity(entity_df).empty
+#
+#     # Online serving: materialize into data/online.db and look up batches of customers
+#     customer_churn_features.materialize()
+#     online = customer_churn_features.retrieve_online(customer_ids[:10], features=["tenure", "Contract"])
+#     print(online)
+#     customer_churn_features.benchmark_online(customer_ids, batch_sizes=(1, 10, 100, 1000))
+#
+#     # Cached serving for the active customer base
+#     cached_features = CustomerChurnFeatures("./", cache_size=500_000)
+#     cached_features.load(source_path)
+#     cached_features.prefetch(customer_ids)
+#     cached_features.benchmark_online(customer_ids, batch_sizes=(1, 10, 100, 1000))
+#     print(cached_features.cache.stats())
+#
+#     # Daily refresh: append only new or changed customers and materialize that window
+#     delta = customer_churn_features.load_incremental(source_path)
+#     print(f"{len(delta)} customers refreshed")
+#
+#     # Without Feast: build a memory-mapped feature table and serve point lookups from it
+#     from utils.table import FeatureTable
+#     FeatureTable.build(pd.read_parquet(source_path), "data/feature_table")
+#     table = FeatureTable("data/feature_table")
+#     print(table.get(customer_ids[0]))
+#
+#     # Model-ready vectors: scoring becomes a lookup plus a dot product
+#     import joblib
+#     from utils.retriver import MODEL_FEATURE_VIEW_NAME
+#     model_path = "../Models/Customer Churn/models/logistic_regression_model.pkl"
+#     preprocessor_paths = ["../Dataset/Processed Data/config.json", "../Dataset/Processed Data/scale_mapping.json"]
+#     customer_churn_features.load_model_features(source_path, model_path, preprocessor_paths)
+#     customer_churn_features.materialize(view=MODEL_FEATURE_VIEW_NAME)
+#     ids, vectors = customer_churn_features.retrieve_model_vectors(
+#         customer_ids[:100], model_version=CustomerChurnFeatures.fingerprint(model_path),
+#         preprocessor_version=CustomerChurnFeatures.fingerprint(*preprocessor_paths))
+#     model = joblib.load(model_path)
+#     print(vectors @ model.coef_[0] + model.intercept_[0])
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+# Cached marker of a customer the store does not know, so repeated lookups of unknown IDs stay in memory
+_ABSENT = object()
+
+
+class FeatureCache:
+    def __init__(self, loader, max_size:int=500_000, ttl:timedelta=timedelta(days=1)):
+        """
+        In-process LRU cache of feature rows keyed by customerID. Customers the store does not know are
+        cached as absent too, so unknown IDs do not go back to the store on every lookup.
+
+        The ttl counts from the time an entry was loaded from the online store, not from the feature's
+        event time: it bounds how far the cache may lag behind the online store. The online rows do not
+        carry their event time; freshness against the source is handled by materialize, which
+        invalidates the refreshed customers (and thereby also absent entries of newly added ones).
+
+        Parameters:
+        loader (callable): Takes a list of customerIDs and returns a dict of customerID -> feature dict
+                           for the IDs that were found.
+        max_size (int): Maximum number of customers (found or absent) held before the least recently used
+                        are evicted.
+        ttl (timedelta): Maximum time since loading of a cached row or absent entry. CustomerChurnFeatures
+                         passes the ttl of its feature view and updates it with set_ttl when the view is
+                         re-registered. 0 or None: entries only leave the cache through eviction or invalidation.
+        """
+        self.loader = loader
+        self.max_size = max_size
+        self.set_ttl(ttl)
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def set_ttl(self, ttl:timedelta):
+        self.ttl = ttl.total_seconds() if ttl else float("inf")
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __lookup(self, customer_id, now):
+        # Caller must hold the lock. Returns None when not cached, _ABSENT for a cached unknown customer
+        entry = self.__entries.get(customer_id)
+        if entry is None:
+            return None
+        loaded_at, row = entry
+        if now - loaded_at > self.ttl:
+            del self.__entries[customer_id]
+            self.expirations += 1
+            return None
+        self.__entries.move_to_end(customer_id)
+        return row
+
+    def __insert(self, rows:dict, now, requested:list=()):
+        # Caller must hold the lock. Requested IDs missing from rows are cached as absent
+        rows = {**dict.fromkeys(requested, _ABSENT), **rows} if requested else rows
+        for customer_id, row in rows.items():
+            self.__entries[customer_id] = (now, row)
+            self.__entries.move_to_end(customer_id)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, customer_ids:list):
+        """
+        Return feature rows for the given customers, loading only the misses from the store.
+
+        Returns:
+        dict: customerID -> feature dict for every customer known to the cache or the store.
+        """
+        now = time.monotonic()
+        found, missing = {}, []
+        with self.__lock:
+            for customer_id in customer_ids:
+                row = self.__lookup(customer_id, now)
+                if row is None:
+                    missing.append(customer_id)
+                else:
+                    self.hits += 1
+                    if row is not _ABSENT:
+                        found[customer_id] = row
+            self.misses += len(missing)
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            loaded = self.loader(missing)
+            with self.__lock:
+                self.__insert(loaded, now, missing)
+            found.update(loaded)
+        return found
+
+    def get(self, customer_id):
+        return self.get_many([customer_id]).get(customer_id)
+
+    def prefetch(self, customer_ids:list):
+        """
+        Load the given customers into the cache in one store round trip, refreshing existing entries.
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        loaded = self.loader(customer_ids)
+        with self.__lock:
+            self.__insert(loaded, time.monotonic(), customer_ids)
+        return len(loaded)
+
+    def invalidate(self, customer_ids:list=None):
+        """
+        Drop cached rows, e.g. after the feature view has been re-materialized.
+
+        Parameters:
+        customer_ids (list): customerIDs to drop. Drops everything if None.
+        """
+        with self.__lock:
+            if customer_ids is None:
+                self.__entries.clear()
+            else:
+                for customer_id in customer_ids:
+                    self.__entries.pop(customer_id, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.__entries),
+            "absent": sum(row is _ABSENT for _, row in self.__entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
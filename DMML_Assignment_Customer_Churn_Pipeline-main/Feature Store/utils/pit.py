@@ -0,0 +1,124 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+ROW_ID = "__entity_row"
+
+
+def _to_utc(series:pd.Series):
+    # Feast treats naive timestamps as UTC, do the same so both sides compare.
+    # merge_asof also needs the same dtype and resolution on both sides: Parquet often yields us, pandas
+    # ns, and a datetime64[us] key against a datetime64[ns] one raises "incompatible merge keys".
+    series = pd.to_datetime(series).dt.as_unit("ns")
+    if series.dt.tz is None:
+        return series.dt.tz_localize("UTC")
+    return series.dt.tz_convert("UTC")
+
+
+def _join_shard(entity_df:pd.DataFrame, feature_df:pd.DataFrame, join_key:str, timestamp_field:str,
+                feature_timestamp:str, ttl:timedelta):
+    # As-of merge of one shard: latest feature row at or before each entity timestamp, within ttl.
+    # Feature rows are pre-sorted so the last of several rows with the same timestamp is the newest.
+    entity_df = entity_df.sort_values(timestamp_field, kind="stable")
+    feature_df = feature_df.sort_values(feature_timestamp, kind="stable")
+    # A zero or missing ttl means the features never expire, as in Feast
+    return pd.merge_asof(entity_df, feature_df, left_on=timestamp_field, right_on=feature_timestamp,
+                         by=join_key, direction="backward", tolerance=ttl or None, allow_exact_matches=True)
+
+
+def point_in_time_join(entity_df:pd.DataFrame, feature_df:pd.DataFrame, features:list, ttl:timedelta,
+                       join_key:str="customerID", timestamp_field:str="event_timestamp",
+                       created_timestamp_field:str=None, shards:int=None, workers:int=None):
+    """
+    Point-in-time join of entity rows with a feature table, equivalent to Feast's historical retrieval
+    on a file source: each entity row gets the latest feature row of its entity whose event timestamp is
+    at or before the entity timestamp and no older than ttl. Ties on event timestamp are broken by the
+    created timestamp.
+
+    Parameters:
+    entity_df (pd.DataFrame): Entity rows with join_key and timestamp_field columns.
+    feature_df (pd.DataFrame): Feature rows with join_key, event_timestamp (and created timestamp) columns.
+    features (list): Feature columns to attach.
+    ttl (timedelta): Maximum age of a feature row relative to the entity timestamp. 0 or None: no limit.
+    join_key (str): Entity join key.
+    timestamp_field (str): Timestamp column of both entity_df and feature_df.
+    created_timestamp_field (str): Optional created timestamp column of feature_df used to break ties.
+    shards (int): Number of entity hash shards joined independently. Defaults to the number of workers.
+    workers (int): Worker processes. Defaults to the CPU count; 1 joins in-process.
+
+    Returns:
+    pd.DataFrame: entity_df in its original row order with the feature columns attached.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    feature_timestamp = f"__feature_{timestamp_field}"
+
+    entities = entity_df.copy()
+    entities[ROW_ID] = np.arange(len(entities))
+    entities[timestamp_field] = _to_utc(entities[timestamp_field])
+
+    sort_columns = [timestamp_field] + ([created_timestamp_field] if created_timestamp_field else [])
+    feature_rows = feature_df[[join_key] + sort_columns + list(features)].sort_values(sort_columns, kind="stable")
+    feature_rows = feature_rows.drop(columns=[created_timestamp_field] if created_timestamp_field else [])
+    feature_rows = feature_rows.rename(columns={timestamp_field: feature_timestamp})
+    feature_rows[feature_timestamp] = _to_utc(feature_rows[feature_timestamp])
+    # Only entities that were requested can match, drop the rest before shuffling data to workers
+    feature_rows = feature_rows[feature_rows[join_key].isin(entities[join_key].unique())]
+
+    entity_shards = pd.util.hash_array(entities[join_key].to_numpy(dtype=object)) % shards
+    feature_shards = pd.util.hash_array(feature_rows[join_key].to_numpy(dtype=object)) % shards
+    tasks = [(entities[entity_shards == shard], feature_rows[feature_shards == shard])
+             for shard in range(shards)]
+    tasks = [(left, right) for left, right in tasks if len(left)]
+
+    args = (join_key, timestamp_field, feature_timestamp, ttl)
+    if workers == 1 or len(tasks) <= 1:
+        results = [_join_shard(left, right, *args) for left, right in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            futures = [executor.submit(_join_shard, left, right, *args) for left, right in tasks]
+            results = [future.result() for future in futures]
+
+    if not results:
+        return entity_df.reindex(columns=list(entity_df.columns) + list(features))
+    joined = pd.concat(results).sort_values(ROW_ID).drop(columns=[ROW_ID, feature_timestamp])
+    return joined.reset_index(drop=True)
+
+
+def compare_joins(expected:pd.DataFrame, actual:pd.DataFrame, features:list, join_key:str="customerID",
+                  timestamp_field:str="event_timestamp"):
+    """
+    Compare two point-in-time join results cell by cell, e.g. Feast's historical retrieval against
+    point_in_time_join. Rows are matched on entity and timestamp, since Feast does not keep the entity_df order.
+
+    Parameters:
+    expected (pd.DataFrame): Reference result (Feast).
+    actual (pd.DataFrame): Result to check (local engine).
+    features (list): Feature columns to compare.
+
+    Returns:
+    pd.DataFrame: Number of mismatching rows per feature; empty when both results agree.
+    """
+    if len(expected) != len(actual):
+        raise ValueError(f"Row counts differ: {len(expected)} expected, {len(actual)} actual")
+
+    def align(df):
+        df = df[[join_key, timestamp_field] + list(features)].copy()
+        df[timestamp_field] = _to_utc(df[timestamp_field])
+        return df.sort_values([join_key, timestamp_field], kind="stable").reset_index(drop=True)
+
+    expected, actual = align(expected), align(actual)
+    if not expected[[join_key, timestamp_field]].equals(actual[[join_key, timestamp_field]]):
+        raise ValueError("Entity rows differ between the two results")
+    mismatches = []
+    for feature in features:
+        left, right = expected[feature], actual[feature]
+        if pd.api.types.is_numeric_dtype(left) and pd.api.types.is_numeric_dtype(right):
+            same = np.isclose(left.astype(float), right.astype(float), equal_nan=True)
+        else:
+            same = (left.astype(object) == right.astype(object)).to_numpy() | (left.isna() & right.isna()).to_numpy()
+        if not same.all():
+            mismatches.append({"feature": feature, "mismatched_rows": int((~same).sum())})
+    return pd.DataFrame(mismatches, columns=["feature", "mismatched_rows"])
@@ -1,10 +1,40 @@
+import hashlib
+import os
+import time
 from datetime import timedelta, datetime
+import numpy as np
 import pandas as pd
-from feast import Feature, FeatureView, Entity, ValueType, FileSource, FeatureStore
+try:
+    from common.utils.raw import read_raw, split_extension
+except ImportError as error:
+    raise ImportError("The feature store reads landed files with the shared helpers in common/, "
+                      "put the repository root on PYTHONPATH (see Feature Store/Readme.md)") from error
+from .cache import FeatureCache
+from .pit import compare_joins, point_in_time_join
+
+FEATURE_VIEW_NAME = "customer_churn_features_view"
+MODEL_FEATURE_VIEW_NAME = "customer_churn_model_features_view"
+
+# ttl of the feature view over a full load, which restamps every row on each load
+FEATURE_TTL = timedelta(days=1)
+# ttl of the feature view over the append-only incremental partitions: a customer's latest row stays valid
+# until a newer one is appended, however long ago it was stamped (0 means no expiry in Feast)
+INCREMENTAL_FEATURE_TTL = timedelta(0)
+
+# Features served by the customer churn feature view (customerID is the entity join key)
+FEATURE_NAMES = [
+    "gender", "SeniorCitizen", "Partner", "Dependents", "tenure",
+    "PhoneService", "MultipleLines", "InternetService", "OnlineSecurity",
+    "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV",
+    "StreamingMovies", "Contract", "PaperlessBilling", "PaymentMethod",
+    "MonthlyCharges", "TotalCharges", "Churn"
+]
 
 
 class CustomerChurnFeatures:
-    def __init__(self, repo_path:str):
+    def __init__(self, repo_path:str, cache_size:int=None):
+        # feast is imported on use: it is slow to import and not needed by the local engine helpers
+        from feast import Entity, FeatureStore, ValueType
 
         # Initialize the feature store
         self.store = FeatureStore(repo_path=repo_path)
@@ -16,64 +46,397 @@ class CustomerChurnFeatures:
         )
         self.customer_features_view = None
         self.customer_data_source = None
+        self.model_features_view = None
+        # Optional in-process cache in front of the online store, expiring with the feature view ttl
+        self.cache = FeatureCache(self.__fetch_online, max_size=cache_size, ttl=self.__registered_ttl()) \
+            if cache_size else None
 
     def load(self, path):
+        # pyarrow.parquet is imported on use like feast, scoring workers that only look up features skip it
+        import pyarrow.parquet as pq
         df = pd.DataFrame()
         if ".csv" in path:
-            df = pd.read_csv(path)
-            path = path.split(".csv")[0]+".parquet"
+            # Raw CSVs may be landed compressed (.csv.gz, .csv.zst), they are decompressed as a stream
+            df = read_raw(path)
+            path = split_extension(path)[0]+".parquet"
             df["event_timestamp"] = datetime.today()
             df.to_parquet(path)
-        # Define a FileSource for the CSV file
+        elif "event_timestamp" not in pq.read_schema(path).names:
+            # Parquet hand-off from cleaning: stamp it once, without a CSV round trip
+            df = pd.read_parquet(path)
+            path = path.split(".parquet")[0]+"_offline.parquet"
+            df["event_timestamp"] = datetime.today()
+            df.to_parquet(path)
+        # Define a FileSource and FeatureView over the file.
+        # We are including all columns from the CSV except customerID.
+        self.__register_source(path)
+        return df
+
+    def load_incremental(self, path:str, timestamp_column:str=None, event_timestamp:datetime=None):
+        """
+        Append only new or changed customer rows to the offline source and materialize just that window.
+
+        Rows are compared with the hashes recorded by the previous run; the delta is written as a
+        timestamped Parquet partition under <path stem>_features/ and the online store is refreshed
+        for the delta's time window only.
+
+        Unchanged customers keep the timestamp of the partition they were last appended in, so the feature
+        view over the partitions is registered without a ttl (INCREMENTAL_FEATURE_TTL): with a 1 day ttl they
+        would drop out of historical retrieval a day after their last change.
+
+        Parameters:
+        path (str): Processed data file (.csv or .parquet).
+        timestamp_column (str): Column holding the real event time of each row, if the data has one.
+        event_timestamp (datetime): Event time stamped on the delta when timestamp_column is not given.
+                                    Defaults to now.
+
+        Returns:
+        pd.DataFrame: The delta that was appended.
+        """
+        df = pd.read_parquet(path) if path.endswith(".parquet") else read_raw(path)
+        stem = split_extension(path)[0]
+        partitions_dir = f"{stem}_features"
+        state_path = f"{stem}_features_state.parquet"
+        os.makedirs(partitions_dir, exist_ok=True)
+
+        # Hash every row so updated customer records are picked up, not just new customerIDs
+        df = df.drop_duplicates(subset="customerID", keep="last").reset_index(drop=True)
+        value_columns = [col for col in df.columns if col != timestamp_column]
+        df["row_hash"] = pd.util.hash_pandas_object(df[value_columns], index=False).values
+        if os.path.exists(state_path):
+            state = pd.read_parquet(state_path)
+            previous = df[["customerID"]].merge(
+                state.astype({"row_hash": "UInt64"}), on="customerID", how="left")["row_hash"]
+            changed = (previous != df["row_hash"]).fillna(True).to_numpy(dtype=bool)
+            delta = df[changed].copy()
+        else:
+            state = pd.DataFrame({"customerID": pd.Series(dtype=object), "row_hash": pd.Series(dtype="uint64")})
+            delta = df.copy()
+
+        if delta.empty:
+            print("No new or changed customer rows, nothing to materialize")
+        else:
+            now = datetime.now()
+            if timestamp_column:
+                delta["event_timestamp"] = pd.to_datetime(delta[timestamp_column])
+            else:
+                delta["event_timestamp"] = event_timestamp or now
+            delta["created_timestamp"] = now
+            partition_file = os.path.join(partitions_dir, f"part-{now.strftime('%Y%m%dT%H%M%S%f')}.parquet")
+            delta.drop(columns=["row_hash"]).to_parquet(partition_file, index=False)
+            print(f"Appended {len(delta)} new or changed rows to {partition_file}")
+
+        self.__register_source(partitions_dir, created_timestamp_column="created_timestamp",
+                               ttl=INCREMENTAL_FEATURE_TTL)
+
+        if not delta.empty:
+            start_date = delta["event_timestamp"].min().to_pydatetime()
+            end_date = delta["event_timestamp"].max().to_pydatetime() + timedelta(microseconds=1)
+            self.materialize(start_date=start_date, end_date=end_date,
+                             customer_ids=delta["customerID"].tolist())
+
+            # Record the new hashes only once the delta is safely materialized
+            state = pd.concat([state[~state["customerID"].isin(delta["customerID"])],
+                               delta[["customerID", "row_hash"]]], ignore_index=True)
+            state.to_parquet(state_path + ".tmp", index=False)
+            os.replace(state_path + ".tmp", state_path)
+        return delta.drop(columns=["row_hash"])
+
+    def __register_source(self, path:str, created_timestamp_column:str=None, ttl:timedelta=FEATURE_TTL):
+        # Point the feature view at the given source, re-applying only when it or the ttl changed
+        from feast import FeatureView, FileSource
+        from feast.errors import FeatureViewNotFoundException
         self.customer_data_source = FileSource(
             path=path,
-            event_timestamp_column="tenure",  # Using tenure as a placeholder for event timestamp.
-            created_timestamp_column=None  # Adjust if you have a created timestamp column.
+            event_timestamp_column="event_timestamp",
+            created_timestamp_column=created_timestamp_column
         )
-
-        # Define a FeatureView for customer churn features.
-        # We are including all columns from the CSV except customerID.
         self.customer_features_view = FeatureView(
-            name="customer_churn_features_view",
+            name=FEATURE_VIEW_NAME,
             entities=[self.entity],
-            ttl=timedelta(days=1),
+            ttl=ttl,
             online=True,
             source=self.customer_data_source,
             description="Feature view for customer churn including demographic and usage features. Version: 1.0"
         )
-        self.store.apply(self.customer_features_view)
-        return df
+        if self.cache is not None:
+            self.cache.set_ttl(ttl)
+        try:
+            registered = self.store.get_feature_view(FEATURE_VIEW_NAME)
+            if registered.batch_source.path == path and (registered.ttl or timedelta(0)) == ttl:
+                return
+        except FeatureViewNotFoundException:
+            # First registration in this repo, apply it below
+            pass
+        self.store.apply([self.entity, self.customer_features_view])
+
+    @staticmethod
+    def fingerprint(*paths):
+        """
+        Content hash of one or more files, used to version preprocessors and models.
+        """
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()[:16]
+
+    def load_model_features(self, path:str, model_path:str, preprocessor_paths:list,
+                            drop_columns:list=("Churn", "customerID"), event_timestamp:datetime=None):
+        """
+        Register a model-ready feature view holding the final encoded and scaled vector of every customer,
+        in the column order the model was trained on, so scoring is a lookup plus a dot product.
+
+        Parameters:
+        path (str): Preprocessed (encoded and scaled) data file (.csv or .parquet).
+        model_path (str): Trained model file; its content hash is recorded as the model version.
+        preprocessor_paths (list): Preprocessor artifacts (config.json, scale_mapping.json); their content
+                                   hash is recorded as the preprocessor version.
+        drop_columns (list): Columns dropped before training, as passed to Model.load_data.
+        event_timestamp (datetime): Event time stamped on the vectors. Defaults to now.
 
-    def retrieve(self, entity_df:pd.DataFrame=None):
+        Returns:
+        pd.DataFrame: customerID, event_timestamp, feature_vector and version columns as written.
+        """
+        from feast import FeatureView, FileSource, Field
+        from feast.types import Array, Float64, String
+
+        df = pd.read_parquet(path) if path.endswith(".parquet") else read_raw(path)
+        columns = [col for col in df.columns if col not in drop_columns]
+        model_version = self.fingerprint(model_path)
+        preprocessor_version = self.fingerprint(*preprocessor_paths)
+
+        vectors = pd.DataFrame({
+            "customerID": df["customerID"],
+            "event_timestamp": event_timestamp or datetime.now(),
+            "feature_vector": list(df[columns].to_numpy(dtype=np.float64)),
+            "preprocessor_version": preprocessor_version,
+            "model_version": model_version
+        })
+        vectors_path = f"{split_extension(path)[0]}_model_features.parquet"
+        vectors.to_parquet(vectors_path, index=False)
+
+        self.model_features_view = FeatureView(
+            name=MODEL_FEATURE_VIEW_NAME,
+            entities=[self.entity],
+            ttl=timedelta(days=1),
+            online=True,
+            schema=[
+                Field(name="feature_vector", dtype=Array(Float64)),
+                Field(name="preprocessor_version", dtype=String),
+                Field(name="model_version", dtype=String)
+            ],
+            source=FileSource(path=vectors_path, event_timestamp_column="event_timestamp"),
+            tags={
+                "preprocessor_version": preprocessor_version,
+                "model_version": model_version,
+                "columns": ",".join(columns)
+            },
+            description="Model-ready encoded and scaled feature vectors for customer churn scoring. Version: 1.0"
+        )
+        self.store.apply([self.entity, self.model_features_view])
+        print(f"Model feature vectors written to {vectors_path} "
+              f"(preprocessor {preprocessor_version}, model {model_version})")
+        return vectors
+
+    def retrieve_model_vectors(self, customer_ids:list, model_version:str=None, preprocessor_version:str=None):
+        """
+        Fetch model-ready vectors for a batch of customers from the online store.
+
+        Parameters:
+        customer_ids (list): customerIDs to score.
+        model_version (str): Expected model version; raises if the stored vectors were built for another model.
+        preprocessor_version (str): Expected preprocessor version (see fingerprint); raises if the stored vectors
+                                    were encoded and scaled with other preprocessor artifacts.
+
+        Returns:
+        tuple: (customerIDs found, np.ndarray of vectors with one row per customer)
+        """
+        df = self.store.get_online_features(
+            features=[f"{MODEL_FEATURE_VIEW_NAME}:{name}"
+                      for name in ("feature_vector", "preprocessor_version", "model_version")],
+            entity_rows=[{"customerID": customer_id} for customer_id in customer_ids]
+        ).to_df()
+        df = df[df["feature_vector"].notna()]
+        if model_version and not (df["model_version"] == model_version).all():
+            raise ValueError(f"Stored feature vectors were not built for model version {model_version}")
+        if preprocessor_version and not (df["preprocessor_version"] == preprocessor_version).all():
+            raise ValueError(f"Stored feature vectors were not built with preprocessor version {preprocessor_version}")
+        return df["customerID"].tolist(), np.vstack(df["feature_vector"].to_list()) if len(df) else np.empty((0, 0))
+
+    @staticmethod
+    def feature_refs(features:list=None):
+        """
+        Build fully qualified feature references for the customer churn feature view.
+
+        Parameters:
+        features (list): Feature names to select. Defaults to all FEATURE_NAMES.
+        """
+        features = features or FEATURE_NAMES
+        return [f"{FEATURE_VIEW_NAME}:{feature}" for feature in features]
+
+    def retrieve(self, entity_df:pd.DataFrame=None, features:list=None, engine:str="feast", workers:int=None):
+        """
+        Retrieve point-in-time correct features for training or batch inference.
+
+        Parameters:
+        entity_df (pd.DataFrame): customerID and event_timestamp of every row to build.
+        features (list): Subset of FEATURE_NAMES to return. Defaults to all features.
+        engine (str): "feast" for Feast's get_historical_features, "local" for the sharded
+                      as-of join over the file source (much faster for large entity_df).
+        workers (int): Worker processes for the local engine. Defaults to the CPU count.
+        """
+        if engine == "local":
+            # The source registered in the store when load/load_incremental did not run on this instance
+            source = self.customer_data_source or self.store.get_feature_view(FEATURE_VIEW_NAME).batch_source
+            feature_df = pd.read_parquet(source.path)
+            return point_in_time_join(entity_df, feature_df, features or FEATURE_NAMES,
+                                      ttl=self.__view_ttl(FEATURE_VIEW_NAME),
+                                      timestamp_field=source.timestamp_field,
+                                      created_timestamp_field=source.created_timestamp_column or None,
+                                      workers=workers)
 
         # Retrieve features for training or inference
         feature_vector = self.store.get_historical_features(
             entity_df=entity_df,
-            features=[
-                "customer_churn_features_view:customerID",
-                "customer_churn_features_view:gender",
-                "customer_churn_features_view:SeniorCitizen",
-                "customer_churn_features_view:Partner",
-                "customer_churn_features_view:Dependents",
-                "customer_churn_features_view:tenure",
-                "customer_churn_features_view:PhoneService",
-                "customer_churn_features_view:MultipleLines",
-                "customer_churn_features_view:InternetService",
-                "customer_churn_features_view:OnlineSecurity",
-                "customer_churn_features_view:OnlineBackup",
-                "customer_churn_features_view:DeviceProtection",
-                "customer_churn_features_view:TechSupport",
-                "customer_churn_features_view:StreamingTV",
-                "customer_churn_features_view:StreamingMovies",
-                "customer_churn_features_view:Contract",
-                "customer_churn_features_view:PaperlessBilling",
-                "customer_churn_features_view:PaymentMethod",
-                "customer_churn_features_view:MonthlyCharges",
-                "customer_churn_features_view:TotalCharges",
-                "customer_churn_features_view:Churn"
-            ]
+            features=self.feature_refs(features)
         ).to_df()
 
         return feature_vector
 
+    def check_parity(self, entity_df:pd.DataFrame, features:list=None, workers:int=None):
+        """
+        Run the same retrieval through Feast and the local point-in-time join and compare the results.
+
+        Parameters:
+        entity_df (pd.DataFrame): customerID and event_timestamp of every row to build.
+        features (list): Subset of FEATURE_NAMES to compare. Defaults to all features.
+        workers (int): Worker processes for the local engine.
+
+        Returns:
+        pd.DataFrame: Number of mismatching rows per feature; empty when the engines agree.
+        """
+        features = features or FEATURE_NAMES
+        expected = self.retrieve(entity_df, features)
+        actual = self.retrieve(entity_df, features, engine="local", workers=workers)
+        mismatches = compare_joins(expected, actual, features)
+        if mismatches.empty:
+            print(f"Local point-in-time join matches Feast on {len(entity_df)} entity rows")
+        else:
+            print("Local point-in-time join differs from Feast:")
+            print(mismatches)
+        return mismatches
+
+    def materialize(self, start_date:datetime=None, end_date:datetime=None, customer_ids:list=None,
+                    view:str=FEATURE_VIEW_NAME):
+        """
+        Materialize a feature view into the online store (sqlite, data/online.db).
+
+        Parameters:
+        start_date (datetime): Start of the window to load. Defaults to end_date - ttl of the view, i.e. every
+                               row the online store may still serve; the Unix epoch if the view has no ttl.
+        end_date (datetime): End of the window to load. Defaults to now.
+        customer_ids (list): Customers refreshed by this window. Only these are dropped from the
+                             feature cache; the whole cache is invalidated if None.
+        view (str): FEATURE_VIEW_NAME or MODEL_FEATURE_VIEW_NAME.
+        """
+        end_date = end_date or datetime.now()
+        if start_date is None:
+            ttl = self.__view_ttl(view)
+            start_date = end_date - ttl if ttl else datetime(1970, 1, 1)
+        self.store.materialize(start_date=start_date, end_date=end_date, feature_views=[view])
+        if self.cache is not None and view == FEATURE_VIEW_NAME:
+            self.cache.invalidate(customer_ids)
+        print(f"Materialized {view} from {start_date} to {end_date} into the online store")
+
+    def __registered_ttl(self):
+        # ttl of the feature view already applied to the store, FEATURE_TTL before the first registration
+        from feast.errors import FeatureViewNotFoundException
+        try:
+            return self.store.get_feature_view(FEATURE_VIEW_NAME).ttl
+        except FeatureViewNotFoundException:
+            return FEATURE_TTL
+
+    def __view_ttl(self, view:str):
+        # ttl of the registered view, as applied to the store when this instance did not register it
+        registered = {FEATURE_VIEW_NAME: self.customer_features_view,
+                      MODEL_FEATURE_VIEW_NAME: self.model_features_view}.get(view)
+        return (registered or self.store.get_feature_view(view)).ttl
+
+    def retrieve_online(self, customer_ids:list, features:list=None):
+        """
+        Fetch the latest feature values for a batch of customers from the online store.
+
+        Parameters:
+        customer_ids (list): customerIDs to look up.
+        features (list): Subset of FEATURE_NAMES to return. Defaults to all features.
+
+        Returns:
+        pd.DataFrame: One row per customerID with the requested features.
+        """
+        if self.cache is None:
+            entity_rows = [{"customerID": customer_id} for customer_id in customer_ids]
+            return self.store.get_online_features(
+                features=self.feature_refs(features),
+                entity_rows=entity_rows
+            ).to_df()
+
+        rows = self.cache.get_many(customer_ids)
+        df = pd.DataFrame([rows.get(customer_id, {}) for customer_id in customer_ids],
+                          columns=FEATURE_NAMES)
+        df.insert(0, "customerID", list(customer_ids))
+        return df[["customerID"] + (features or FEATURE_NAMES)]
+
+    def prefetch(self, customer_ids:list):
+        """
+        Warm the feature cache for a list of customers (e.g. the active customer base).
+        """
+        if self.cache is None:
+            raise ValueError("Feature cache is disabled, pass cache_size to enable it")
+        return self.cache.prefetch(customer_ids)
+
+    def __fetch_online(self, customer_ids:list):
+        # Cache loader: fetch all features and key rows by customerID, skipping unknown customers
+        df = self.store.get_online_features(
+            features=self.feature_refs(),
+            entity_rows=[{"customerID": customer_id} for customer_id in customer_ids]
+        ).to_df()
+        rows = {}
+        for record in df.to_dict(orient="records"):
+            customer_id = record.pop("customerID")
+            if any(pd.notna(value) for value in record.values()):
+                rows[customer_id] = record
+        return rows
+
+    def benchmark_online(self, customer_ids:list, batch_sizes=(1, 10, 100, 1000), features:list=None, repeat:int=5):
+        """
+        Measure online lookup latency for different batch sizes.
+
+        Parameters:
+        customer_ids (list): Pool of customerIDs to draw the batches from.
+        batch_sizes (tuple): Number of customers requested per lookup.
+        features (list): Subset of FEATURE_NAMES to fetch.
+        repeat (int): Number of lookups timed per batch size.
 
+        Returns:
+        pd.DataFrame: Mean batch latency and per-customer latency (ms) for each batch size.
+        """
+        results = []
+        for batch_size in batch_sizes:
+            batch = customer_ids[:batch_size]
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                self.retrieve_online(batch, features)
+                timings.append((time.perf_counter() - start) * 1000)
+            batch_ms = sum(timings) / len(timings)
+            results.append({
+                "batch_size": len(batch),
+                "batch_ms": batch_ms,
+                "per_customer_ms": batch_ms / max(len(batch), 1)
+            })
+        report = pd.DataFrame(results)
+        print("Online lookup latency:")
+        print(report)
+        return report
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+
+class FeatureTable:
+    """
+    Read-optimized, memory-mapped feature table for deployments without Feast.
+
+    Each build is written to its own version directory under the table root:
+        features.npy  float64 matrix of encoded features, one contiguous column per feature
+        keys.npy      fixed-width customerIDs in row order
+        index.npy     open-addressing hash index, slot -> row + 1 (0 marks an empty slot)
+        meta.json     column names, row and slot counts
+    The `current` symlink is swapped atomically once a build is complete, so readers never see a
+    half-written table. Files are opened with mmap, so every process shares one copy in the page cache.
+    """
+    CURRENT = "current"
+
+    def __init__(self, root:str):
+        """
+        Open the current version of the table.
+
+        Parameters:
+        root (str): Table root directory created by FeatureTable.build.
+        """
+        self.root = root
+        self.version = None
+        self.refresh()
+
+    @staticmethod
+    def hash_key(key:bytes):
+        # Stable across processes, unlike hash()
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+    @classmethod
+    def hash_keys(cls, keys):
+        return np.fromiter((cls.hash_key(key) for key in keys), dtype=np.uint64, count=len(keys))
+
+    @classmethod
+    def build(cls, df:pd.DataFrame, root:str, key:str="customerID", columns:list=None, keep_versions:int=2):
+        """
+        Write a new table version from a DataFrame of encoded features and swap it in.
+
+        Parameters:
+        df (pd.DataFrame): Encoded features, one row per customer.
+        root (str): Table root directory.
+        key (str): Column holding the customerID.
+        columns (list): Feature columns to store. Defaults to every numeric column except the key.
+        keep_versions (int): Number of old versions kept on disk for readers that still hold them.
+
+        Returns:
+        str: Path of the new version directory.
+        """
+        df = df.drop_duplicates(subset=key, keep="last")
+        if columns is None:
+            columns = [col for col in df.select_dtypes(include="number").columns if col != key]
+        keys = df[key].astype(str).to_numpy()
+        n_rows = len(keys)
+
+        os.makedirs(root, exist_ok=True)
+        version = f"v{datetime.now().strftime('%Y%m%dT%H%M%S%f')}"
+        version_path = os.path.join(root, version)
+        tmp_path = version_path + ".tmp"
+        os.makedirs(tmp_path)
+
+        features = np.lib.format.open_memmap(os.path.join(tmp_path, "features.npy"), mode="w+",
+                                             dtype=np.float64, shape=(len(columns), n_rows))
+        for i, col in enumerate(columns):
+            features[i] = df[col].to_numpy(dtype=np.float64)
+        features.flush()
+        del features
+        encoded = np.array([k.encode() for k in keys], dtype=bytes)
+        np.save(os.path.join(tmp_path, "keys.npy"), encoded)
+        n_slots = cls.__build_index(encoded, tmp_path)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump({"key": key, "columns": columns, "rows": n_rows, "slots": n_slots}, f)
+
+        # Publish: rename the finished directory, then atomically repoint the symlink
+        os.rename(tmp_path, version_path)
+        link_tmp = os.path.join(root, f"{cls.CURRENT}.{version}")
+        os.symlink(version, link_tmp)
+        os.replace(link_tmp, os.path.join(root, cls.CURRENT))
+        print(f"Feature table {version} published with {n_rows} rows and {len(columns)} features")
+
+        versions = sorted(v for v in os.listdir(root) if v.startswith("v") and not v.endswith(".tmp"))
+        for old in versions[:-(keep_versions + 1)]:
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+        return version_path
+
+    @classmethod
+    def __build_index(cls, keys, path):
+        # Linear probing, resolved in vectorized rounds: each round every pending key claims its
+        # current slot, the first claimant of a free slot wins and the rest move to the next slot.
+        n_slots = 1 << max(4, int(2 * max(len(keys), 1) - 1).bit_length())
+        mask = n_slots - 1
+        index = np.zeros(n_slots, dtype=np.int64)
+        rows = np.arange(len(keys), dtype=np.int64)
+        slots = (cls.hash_keys(keys) & np.uint64(mask)).astype(np.int64)
+        while len(rows):
+            free = index[slots] == 0
+            candidate_slots, first = np.unique(slots[free], return_index=True)
+            winners = rows[free][first]
+            index[candidate_slots] = winners + 1
+            placed = np.zeros(len(rows), dtype=bool)
+            placed[np.flatnonzero(free)[first]] = True
+            rows, slots = rows[~placed], (slots[~placed] + 1) & mask
+        np.save(os.path.join(path, "index.npy"), index)
+        return n_slots
+
+    def refresh(self):
+        """
+        Re-open the table if a newer version has been published. Returns True if it changed.
+        """
+        version_path = os.path.realpath(os.path.join(self.root, self.CURRENT))
+        if version_path == self.version:
+            return False
+        with open(os.path.join(version_path, "meta.json")) as f:
+            meta = json.load(f)
+        self.columns = meta["columns"]
+        self.features = np.load(os.path.join(version_path, "features.npy"), mmap_mode="r")
+        self.keys = np.load(os.path.join(version_path, "keys.npy"), mmap_mode="r")
+        self.index = np.load(os.path.join(version_path, "index.npy"), mmap_mode="r")
+        self.mask = meta["slots"] - 1
+        self.version = version_path
+        return True
+
+    def __len__(self):
+        return len(self.keys)
+
+    def row(self, customer_id:str):
+        """
+        Return the row offset of a customer, or -1 if the customer is not in the table.
+        """
+        encoded = str(customer_id).encode()
+        slot = self.hash_key(encoded) & self.mask
+        while True:
+            row = self.index[slot] - 1
+            if row < 0:
+                return -1
+            if self.keys[row] == encoded:
+                return int(row)
+            slot = (slot + 1) & self.mask
+
+    def rows(self, customer_ids:list):
+        """
+        Vectorized row lookup for a batch of customers, -1 for unknown customers.
+        """
+        encoded = np.asarray([str(customer_id).encode() for customer_id in customer_ids])
+        result = np.full(len(encoded), -1, dtype=np.int64)
+        pending = np.arange(len(encoded))
+        slots = (self.hash_keys(encoded) & np.uint64(self.mask)).astype(np.int64)
+        while len(pending):
+            rows = np.asarray(self.index[slots]) - 1
+            empty = rows < 0
+            found = ~empty
+            found[found] = np.asarray(self.keys[rows[found]]) == encoded[pending[found]]
+            result[pending[found]] = rows[found]
+            keep = ~(empty | found)
+            pending, slots = pending[keep], (slots[keep] + 1) & self.mask
+        return result
+
+    def get(self, customer_id:str):
+        """
+        Return the encoded feature vector of a customer as a view on the mapped file, or None.
+        """
+        row = self.row(customer_id)
+        if row < 0:
+            return None
+        return self.features[:, row]
+
+    def get_many(self, customer_ids:list, columns:list=None):
+        """
+        Return encoded features for a batch of customers as a DataFrame (NaN rows for unknown customers).
+        """
+        rows = self.rows(customer_ids)
+        columns = columns or self.columns
+        positions = [self.columns.index(col) for col in columns]
+        values = np.full((len(rows), len(columns)), np.nan)
+        known = rows >= 0
+        values[known] = self.features[np.ix_(positions, rows[known])].T
+        df = pd.DataFrame(values, columns=columns)
+        df.insert(0, "customerID", list(customer_ids))
+        return df
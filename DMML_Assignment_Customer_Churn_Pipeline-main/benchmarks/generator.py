@@ -0,0 +1,143 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "customerID", "gender", "SeniorCitizen", "Partner", "Dependents", "tenure", "PhoneService",
+    "MultipleLines", "InternetService", "OnlineSecurity", "OnlineBackup", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies", "Contract", "PaperlessBilling",
+    "PaymentMethod", "MonthlyCharges", "TotalCharges", "Churn"
+]
+INTERNET_ADDONS = ["OnlineSecurity", "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV", "StreamingMovies"]
+PAYMENT_METHODS = ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"]
+# SeniorCitizen is not imputed by the cleaning config, so it is kept complete by default
+MISSING_COLUMNS = [col for col in COLUMNS if col not in ("customerID", "SeniorCitizen")]
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+# Out-of-range values per column, outside the validation config ranges
+OUT_OF_RANGE = {"tenure": (-5, 150), "MonthlyCharges": (-10.0, 5000.0), "TotalCharges": (-100.0, 2e6), "SeniorCitizen": (2, 2)}
+
+
+class SyntheticTelcoGenerator:
+    def __init__(self, seed:int=42, missing_rate:float=0.0, duplicate_rate:float=0.0, out_of_range_rate:float=0.0,
+                 missing_columns:list=None):
+        """
+        Deterministic generator of Telco customer churn rows matching Telco-Customer-Churn.csv and the
+        validation config dtypes/ranges. Rows are produced in chunks, so any size from 10k to 100M rows
+        can be streamed to disk; the same seed and chunk size always give the same rows.
+
+        :param seed: Random seed
+        :param missing_rate: Fraction of cells set to missing in each of missing_columns
+        :param duplicate_rate: Fraction of rows replaced by a copy of another row of the same chunk
+        :param out_of_range_rate: Fraction of rows with one numeric value outside the validation ranges
+        :param missing_columns: Columns that receive missing values, defaults to MISSING_COLUMNS
+        """
+        self.seed = seed
+        self.missing_rate = missing_rate
+        self.duplicate_rate = duplicate_rate
+        self.out_of_range_rate = out_of_range_rate
+        self.missing_columns = missing_columns or MISSING_COLUMNS
+
+    @staticmethod
+    def customer_ids(start:int, n:int):
+        # Unique, Telco-like IDs ("1234-ABCDE") derived from the global row number
+        index = np.arange(start, start + n)
+        digits = np.char.zfill((index % 10000).astype(str), 4)
+        rest = index // 10000
+        letters = ["".join(row) for row in LETTERS[np.stack([(rest // 26 ** i) % 26 for i in range(5)], axis=1)]]
+        return np.char.add(np.char.add(digits, "-"), np.array(letters))
+
+    def __chunk(self, start:int, n:int, chunk_index:int):
+        rng = np.random.default_rng([self.seed, chunk_index])
+        yes_no = np.array(["No", "Yes"])
+
+        tenure = rng.integers(0, 73, n)
+        contract = rng.choice(["Month-to-month", "One year", "Two year"], n, p=[0.55, 0.21, 0.24])
+        internet = rng.choice(["DSL", "Fiber optic", "No"], n, p=[0.34, 0.44, 0.22])
+        phone = rng.choice(yes_no, n, p=[0.1, 0.9])
+        df = pd.DataFrame({
+            "customerID": self.customer_ids(start, n),
+            "gender": rng.choice(["Female", "Male"], n),
+            "SeniorCitizen": (rng.random(n) < 0.16).astype(np.int64),
+            "Partner": rng.choice(yes_no, n, p=[0.52, 0.48]),
+            "Dependents": rng.choice(yes_no, n, p=[0.7, 0.3]),
+            "tenure": tenure,
+            "PhoneService": phone,
+            "MultipleLines": np.where(phone == "No", "No phone service", rng.choice(yes_no, n, p=[0.53, 0.47])),
+            "InternetService": internet,
+        })
+        for col in INTERNET_ADDONS:
+            df[col] = np.where(internet == "No", "No internet service", rng.choice(yes_no, n, p=[0.6, 0.4]))
+        df["Contract"] = contract
+        df["PaperlessBilling"] = rng.choice(yes_no, n, p=[0.41, 0.59])
+        df["PaymentMethod"] = rng.choice(PAYMENT_METHODS, n, p=[0.34, 0.23, 0.22, 0.21])
+        base = np.select([internet == "Fiber optic", internet == "DSL"], [70.0, 45.0], 20.0)
+        monthly = np.round(base + rng.random(n) * 30 + (phone == "Yes") * 5, 2)
+        df["MonthlyCharges"] = monthly
+        df["TotalCharges"] = np.round(monthly * tenure * rng.uniform(0.95, 1.05, n), 2)
+
+        # Churn is more likely for short tenure, month-to-month contracts and fibre customers
+        logit = -0.9 - 0.04 * tenure + 1.3 * (contract == "Month-to-month") + 0.6 * (internet == "Fiber optic")
+        df["Churn"] = np.where(rng.random(n) < 1 / (1 + np.exp(-logit)), "Yes", "No")
+        return self.__inject(df, rng)
+
+    def __inject(self, df:pd.DataFrame, rng):
+        n = len(df)
+        if self.out_of_range_rate:
+            rows = np.flatnonzero(rng.random(n) < self.out_of_range_rate)
+            columns = rng.choice(list(OUT_OF_RANGE), len(rows))
+            for col in OUT_OF_RANGE:
+                selected = rows[columns == col]
+                if len(selected):
+                    low, high = OUT_OF_RANGE[col]
+                    df.loc[selected, col] = np.where(rng.random(len(selected)) < 0.5, low, high).astype(df[col].dtype)
+        if self.missing_rate:
+            for col in self.missing_columns:
+                mask = rng.random(n) < self.missing_rate
+                if mask.any():
+                    df[col] = df[col].where(~mask)
+        if self.duplicate_rate and n > 1:
+            rows = np.flatnonzero(rng.random(n) < self.duplicate_rate)
+            rows = rows[rows > 0]
+            sources = (rng.random(len(rows)) * rows).astype(np.int64)
+            df.iloc[rows] = df.iloc[sources].to_numpy()
+        return df
+
+    def iter_chunks(self, n_rows:int, chunk_size:int=1_000_000):
+        """
+        Yield DataFrames of at most chunk_size rows until n_rows rows were produced.
+        """
+        for chunk_index, start in enumerate(range(0, n_rows, chunk_size)):
+            yield self.__chunk(start, min(chunk_size, n_rows - start), chunk_index)
+
+    def generate(self, n_rows:int, chunk_size:int=1_000_000):
+        """
+        Generate n_rows rows in memory.
+        """
+        return pd.concat(self.iter_chunks(n_rows, chunk_size), ignore_index=True)
+
+    def write_csv(self, path:str, n_rows:int, chunk_size:int=1_000_000):
+        """
+        Stream n_rows rows to a CSV file chunk by chunk, with constant memory.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        for i, chunk in enumerate(self.iter_chunks(n_rows, chunk_size)):
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        return path
+
+    def write_json(self, path:str, n_rows:int, chunk_size:int=1_000_000):
+        """
+        Write n_rows rows as a JSON array of string-valued records, as returned by the customer API.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write("[")
+            first = True
+            for chunk in self.iter_chunks(n_rows, chunk_size):
+                records = chunk.astype(object).where(chunk.notna(), None).astype(str).where(chunk.notna(), None)
+                for record in records.to_dict(orient="records"):
+                    f.write(("" if first else ", ") + json.dumps(record))
+                    first = False
+            f.write("]")
+        return path
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.main import BASELINE_PATH, root
+
+# Run from the repository root:
+#   python -m benchmarks.import_time
+#   python -m benchmarks.import_time --update-baseline
+# Modules imported by Airflow tasks and scoring workers, with the modules they must not load at import time
+IMPORT_CHECKS = {
+    "common.utils.logger": ["pandas"],
+    "ingestion.main": ["requests", "matplotlib", "seaborn", "sklearn"],
+    "validation.main": ["matplotlib", "seaborn", "sklearn"],
+    "cleaning.main": ["matplotlib", "seaborn", "sklearn"],
+    "model_training.main": ["matplotlib", "seaborn"],
+    "utils.retriver": ["feast", "matplotlib", "seaborn", "sklearn", "pyarrow.parquet"],
+}
+
+# Absolute slack on top of the relative tolerance, so millisecond imports do not fail on noise
+SLACK_S = 0.05
+
+# Executed in a fresh interpreter per module
+PROBE = """
+import importlib, json, sys, threading, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({
+    "seconds": seconds,
+    "loaded": [name for name in sys.argv[2:] if name in sys.modules],
+    "threads": [thread.name for thread in threading.enumerate() if thread is not threading.main_thread()]
+}))
+"""
+
+
+def probe(module:str, forbidden:list):
+    """
+    Import a module in a fresh interpreter, from an empty working folder.
+
+    :return: {seconds, loaded, threads, files, error}: import time, forbidden modules that were loaded,
+             threads that were started, files or folders created by the import (e.g. ../logs) and the last
+             error line when the import failed
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stage code writes relative to its working folder and its parent (../logs, ../Dataset, ...)
+        cwd = os.path.join(tmp, "run")
+        os.makedirs(cwd)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.path.join(root, "Feature Store")]))
+        process = subprocess.run([sys.executable, "-c", PROBE, module] + forbidden, cwd=cwd, env=env,
+                                 capture_output=True, text=True)
+        if process.returncode == 0:
+            result = dict(json.loads(process.stdout.strip().splitlines()[-1]), error=None)
+        else:
+            error = process.stderr.strip().splitlines()
+            result = {"seconds": float("inf"), "loaded": [], "threads": [], "error": error[-1] if error else ""}
+        result["files"] = sorted(os.path.relpath(os.path.join(folder, name), tmp)
+                                 for folder, dirs, files in os.walk(tmp) for name in dirs + files
+                                 if os.path.join(folder, name) != cwd)
+    return result
+
+
+def run(repeat:int=3):
+    """
+    Probe every module of IMPORT_CHECKS `repeat` times and keep the fastest import.
+    """
+    results = {}
+    for module, forbidden in IMPORT_CHECKS.items():
+        runs = [probe(module, forbidden) for _ in range(repeat)]
+        results[module] = min(runs, key=lambda result: result["seconds"])
+        print(f"{module:<22} {results[module]['seconds']:>7.3f}s" if not results[module]["error"]
+              else f"{module:<22} failed: {results[module]['error']}")
+    return results
+
+
+def check(results:dict, baseline:dict, tolerance:float=0.3):
+    """
+    :return: List of problems: side effects, forbidden modules and imports slower than the baseline
+    """
+    problems = []
+    for module, result in results.items():
+        if result["error"]:
+            problems.append(f"{module} cannot be imported: {result['error']}")
+            continue
+        if result["loaded"]:
+            problems.append(f"{module} imports {', '.join(result['loaded'])}")
+        if result["threads"]:
+            problems.append(f"{module} starts threads on import: {', '.join(result['threads'])}")
+        if result["files"]:
+            problems.append(f"{module} creates files on import: {', '.join(result['files'])}")
+        reference = baseline.get(module)
+        if reference and result["seconds"] > reference * (1 + tolerance) + SLACK_S:
+            problems.append(f"{module} imports in {result['seconds']:.3f}s, baseline {reference:.3f}s")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time and import side effect checks")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the import times as the new baseline")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    problems = check(results, baselines.get("imports", {}), args.tolerance)
+    if args.update_baseline and not problems:
+        baselines["imports"] = {module: result["seconds"] for module, result in results.items()}
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"Import baseline written to {args.baseline}")
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    sys.exit(1 if problems else 0)
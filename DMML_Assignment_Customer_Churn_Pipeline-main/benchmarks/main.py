@@ -0,0 +1,275 @@
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generator import SyntheticTelcoGenerator
+from benchmarks.stub_server import StubAPIServer
+
+# Run from the repository root:
+#   python -m benchmarks.main --rows 100000
+#   python -m benchmarks.main --rows 1000000 --only clean,train --update-baseline
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(root, "benchmarks", "baseline.json")
+LANDED_DATE = "20250101"
+# Everything prepare and the benchmarks write below the work folder, removed before a reused folder is prepared
+GENERATED = ("telco.csv", "telco.json", "landed", "raw", "ingest_csv", "ingest_api", "reports",
+             "processed_data.parquet", "feature_table", "metrics")
+DROP_COLUMNS = ["Churn", "customerID"]
+
+
+def _feature_store_module(name:str):
+    # "Feature Store" is not an importable package name, load its helpers from their files
+    path = os.path.join(root, "Feature Store", "utils", f"{name}.py")
+    spec = importlib.util.spec_from_file_location(f"feature_store_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _features(workdir:str):
+    # Encoded features keyed by customerID, for the feature store benchmarks
+    return pd.read_parquet(os.path.join(workdir, "processed_data.parquet")).drop(columns=["Churn"])
+
+
+def prepare(workdir:str, rows:int, seed:int=42, missing_rate:float=0.01, duplicate_rate:float=0.01,
+            out_of_range_rate:float=0.005):
+    """
+    Generate the benchmark inputs once: a raw CSV, the matching API payload, a landed partition and the
+    cleaned training data. None of this is timed. Outputs of a previous run in the same work folder are
+    removed first, e.g. an uncompressed telco.csv landed next to the new telco.csv.gz would be read too.
+    """
+    for name in GENERATED:
+        path = os.path.join(workdir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    from cleaning.main import conf
+    from cleaning.utils.preprocess import DataProcessor
+    from common.utils.handoff import write_table
+    from common.utils.raw import compress_file, default_codec
+
+    generator = SyntheticTelcoGenerator(seed, missing_rate, duplicate_rate, out_of_range_rate)
+    csv_path = generator.write_csv(os.path.join(workdir, "telco.csv"), rows)
+    generator.write_json(os.path.join(workdir, "telco.json"), min(rows, 100_000))
+    landed = os.path.join(workdir, "landed", LANDED_DATE, "CSV")
+    os.makedirs(landed, exist_ok=True)
+    # Landed the way DataStorage stores it, compressed with the default codec
+    compress_file(csv_path, os.path.join(landed, "telco.csv"), default_codec())
+
+    processor = DataProcessor(os.path.dirname(os.path.dirname(landed)), conf, show_summary=False)
+    processor.process()
+    write_table(processor.preprocessed_df, os.path.join(workdir, "processed_data.parquet"))
+
+
+# Each benchmark does its (untimed) setup and returns a callable running the measured work once and
+# returning the number of rows it processed.
+def bench_ingest_csv(workdir:str):
+    from ingestion.utils.ingestion import CSVDataIngestion
+    from ingestion.utils.storage import DataStorage
+
+    def run():
+        data, file = CSVDataIngestion.ingest(os.path.join(workdir, "telco.csv"), os.path.join(workdir, "raw"))
+        DataStorage(name="ingest_csv", storage_root=workdir).store(file)
+        return len(data)
+    return run
+
+
+def bench_ingest_api(workdir:str):
+    from ingestion.utils.ingestion import APIDataIngestion
+    from ingestion.utils.storage import DataStorage
+    # Served by a daemon thread until the benchmark process exits
+    server = StubAPIServer(os.path.join(workdir, "telco.json")).start()
+
+    def run():
+        data, file = APIDataIngestion.ingest(server.url, output_dir=os.path.join(workdir, "raw"))
+        DataStorage(name="ingest_api", storage_root=workdir).store(file)
+        return len(data)
+    return run
+
+
+def bench_validate(workdir:str):
+    from validation.main import config, validate
+    return lambda: validate(config, os.path.join(workdir, "landed"), os.path.join(workdir, "reports"))["rows"]
+
+
+def bench_clean(workdir:str):
+    from cleaning.main import conf
+    from cleaning.utils.preprocess import DataProcessor
+    return lambda: len(DataProcessor(os.path.join(workdir, "landed"), conf, show_summary=False).process())
+
+
+def bench_train(workdir:str):
+    from model_training.model import Model
+    data = pd.read_parquet(os.path.join(workdir, "processed_data.parquet"))
+
+    def run():
+        Model.train(*Model.load_data(None, "Churn", DROP_COLUMNS, data=data))
+        return len(data)
+    return run
+
+
+def bench_score(workdir:str):
+    from model_training.model import Model
+    data = pd.read_parquet(os.path.join(workdir, "processed_data.parquet"))
+    model, _ = Model.train(*Model.load_data(None, "Churn", DROP_COLUMNS, data=data))
+    vectors = data.drop(columns=DROP_COLUMNS).to_numpy(dtype=np.float64)
+    return lambda: len(Model.score_vectors(model, vectors))
+
+
+def bench_feature_table(workdir:str):
+    table_module = _feature_store_module("table")
+    df = _features(workdir)
+    table_root = os.path.join(workdir, "feature_table")
+    table_module.FeatureTable.build(df, table_root)
+    table = table_module.FeatureTable(table_root)
+    rng = np.random.default_rng(0)
+    batches = [df["customerID"].to_numpy()[rng.integers(0, len(df), 1000)] for _ in range(20)]
+    return lambda: sum(len(table.get_many(batch)) for batch in batches)
+
+
+def bench_pit_join(workdir:str):
+    pit = _feature_store_module("pit")
+    df = _features(workdir)
+    rng = np.random.default_rng(0)
+    start = datetime(2025, 1, 1)
+    df["event_timestamp"] = start + pd.to_timedelta(rng.integers(0, 30 * 24, len(df)), unit="h")
+    entity_df = df[["customerID"]].sample(frac=1.0, random_state=0)
+    entity_df["event_timestamp"] = start + timedelta(days=30)
+    features = [col for col in df.columns if col not in ("customerID", "event_timestamp")]
+    return lambda: len(pit.point_in_time_join(entity_df, df, features, timedelta(days=60), workers=1))
+
+
+BENCHMARKS = {
+    "ingest_csv": bench_ingest_csv,
+    "ingest_api": bench_ingest_api,
+    "validate": bench_validate,
+    "clean": bench_clean,
+    "train": bench_train,
+    "score": bench_score,
+    "feature_table": bench_feature_table,
+    "pit_join": bench_pit_join,
+}
+
+
+def _peak_rss_mb():
+    # VmHWM starts over with the new address space of a spawned process, while ru_maxrss is inherited
+    # from the parent across exec and would report the peak of the data generation instead
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_one(name:str, workdir:str, repeat:int):
+    # Runs in a fresh process, so the peak memory is that of this benchmark alone (imports and setup included).
+    # The fastest of `repeat` runs is kept, which is the least disturbed by other load on the machine.
+    run = BENCHMARKS[name](workdir)
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = run()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return {
+        "rows": int(rows),
+        "seconds": seconds,
+        "rows_per_s": rows / seconds if seconds else None,
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+
+def run(rows:int, names:list=None, workdir:str=None, seed:int=42, repeat:int=3):
+    """
+    Generate the inputs and run the selected benchmarks, each in its own process.
+
+    :param rows: Synthetic rows to generate
+    :param names: Benchmarks to run, defaults to all of BENCHMARKS
+    :param workdir: Folder for the generated data, a temporary folder by default
+    :param seed: Generator seed
+    :param repeat: Timed runs per benchmark, the fastest one is reported
+    :return: {benchmark: {rows, seconds, rows_per_s, peak_rss_mb}}
+    """
+    names = names or list(BENCHMARKS)
+    cleanup = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="dmml_bench_")
+    # Logs and stage metrics of the benchmarked code stay in the work folder
+    os.environ.setdefault("PIPELINE_METRICS_DIR", os.path.join(workdir, "metrics"))
+    try:
+        print(f"Generating {rows} rows in {workdir}")
+        prepare(workdir, rows, seed)
+        results = {}
+        context = multiprocessing.get_context("spawn")
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[name] = executor.submit(_run_one, name, workdir, repeat).result()
+            print(f"{name:<14} {results[name]['rows_per_s']:>14,.0f} rows/s {results[name]['peak_rss_mb']:>10,.1f} MB peak")
+        return results
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results:dict, baseline:dict, tolerance:float=0.3):
+    """
+    Compare results with a baseline of the same size. A benchmark regresses when its throughput drops or its
+    peak memory grows by more than the tolerance.
+
+    :return: List of regression messages, empty when everything is within tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        if result["rows_per_s"] < reference["rows_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rows_per_s']:,.0f} rows/s, baseline {reference['rows_per_s']:,.0f}")
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: {result['peak_rss_mb']:,.1f} MB peak, baseline {reference['peak_rss_mb']:,.1f}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmarks on synthetic Telco data")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--only", help="Comma separated benchmarks, e.g. clean,train")
+    parser.add_argument("--workdir", help="Keep the generated data in this folder")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark, the fastest is kept")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.only.split(",") if args.only else None, args.workdir, repeat=args.repeat)
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    key = str(args.rows)
+    if args.update_baseline:
+        baselines[key] = dict(baselines.get(key, {}), **results)
+        baselines.setdefault("machine", {}).update({key: f"{platform.platform()}, {os.cpu_count()} CPUs"})
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"Baseline for {args.rows} rows written to {args.baseline}")
+    elif key in baselines:
+        regressions = compare(results, baselines[key], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+    else:
+        print(f"No baseline for {args.rows} rows in {args.baseline}, run with --update-baseline to record one")
@@ -0,0 +1,51 @@
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def __init__(self, payload, *args, **kwargs):
+        self.payload = payload
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, format, *args):
+        # Keep request lines out of the benchmark output
+        pass
+
+
+class StubAPIServer:
+    def __init__(self, json_path:str, host:str="127.0.0.1"):
+        """
+        Local stand-in for the customer API: serves the records of a JSON file on every GET, so API
+        ingestion can be benchmarked without network access or rate limits.
+
+        :param json_path: JSON array of records, e.g. written by SyntheticTelcoGenerator.write_json
+        :param host: Interface to bind, a free port is picked automatically
+        """
+        with open(json_path, "rb") as f:
+            payload = f.read()
+        self.server = ThreadingHTTPServer((host, 0), partial(_Handler, payload))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/users"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,6 +1,13 @@
 import os
 import json
+import numpy as np
+import pandas as pd
+from cleaning.utils.logger import logger
 from cleaning.utils.preprocess import DataProcessor
+from common.utils.dedup import DedupIndex
+from common.utils.handoff import write_table, read_table
+from common.utils.instrumentation import stage, timed
+from common.utils.raw import read_raw
 
 # source_path = "../Dataset/Customer Churn Data"
 # output_path = "../Dataset/Processed Data"
@@ -36,17 +43,129 @@ conf = {
 
 # Initialize the DataProcessor with your dataset filepath
 
-def process(source_path, output_path, config):
+@stage("clean")
+def process(source_path, output_path, config, export_csv=False, return_data=False):
+    """
+    Clean and preprocess the landed data and hand it off to training and the feature store as Parquet.
+
+    Parameters:
+    source_path (str): Root of the landed raw partitions.
+    output_path (str): Folder for processed_data.parquet, data.parquet, config.json and scale_mapping.json.
+    config (dict): Cleaning configuration (see conf).
+    export_csv (bool): Also export processed_data.csv and data.csv.
+    return_data (bool): Return the preprocessed DataFrame so in-process callers can skip re-reading it.
+    """
     processor = DataProcessor(source_path, config)
     processor.process()
+    save_outputs(processor, output_path, export_csv)
+    if return_data:
+        return processor.preprocessed_df
+
+
+@timed("save_outputs")
+def save_outputs(processor, output_path, export_csv=False):
     # Optionally, save the preprocessed data
     if not os.path.exists(output_path):
         os.makedirs(output_path)
+    metadata = {
+        "stage": "cleaning",
+        "config": processor.config,
+        "scaler_mapping": processor.scaler_mapping,
+        "categorical_mappings": getattr(processor, "categorical_mappings", None)
+    }
     if processor.preprocessed_df is not None:
-        processor.preprocessed_df.to_csv(os.path.join(output_path, 'processed_data.csv'), index=False)
+        write_table(processor.preprocessed_df, os.path.join(output_path, 'processed_data.parquet'),
+                    metadata=metadata, export_csv=export_csv)
     if processor.cleaned_df is not None:
-        processor.cleaned_df.to_csv(os.path.join(output_path, 'data.csv'), index=False)
+        write_table(processor.cleaned_df, os.path.join(output_path, 'data.parquet'),
+                    metadata=metadata, export_csv=export_csv)
         with open(os.path.join(output_path, "config.json"), 'w') as f:
             f.write(json.dumps(processor.config))
         with open(os.path.join(output_path, "scale_mapping.json"), 'w') as f:
             f.write(json.dumps(processor.scaler_mapping))
+
+
+def staged_partition_path(partition_path, staging_path):
+    # <root>/<date>/<FORMAT> -> <staging>/<date>_<FORMAT>.parquet
+    date, source_type = os.path.normpath(partition_path).split(os.sep)[-2:]
+    return os.path.join(staging_path, f"{date}_{source_type}.parquet")
+
+
+@timed("load_partition")
+def load_partition(partition_path, index):
+    """
+    Load the files of a partition in landing order, as recorded in the dedup index.
+
+    Returns:
+    (pd.DataFrame, np.ndarray): The partition, and the version of every row: "<landing time>/<row in file>".
+    """
+    paths = [os.path.join(partition_path, file) for file in os.listdir(partition_path)]
+    landed_at = index.landed_at(paths)
+    frames, versions = [], []
+    for path in sorted(paths, key=lambda path: (landed_at[path], path)):
+        logger.info(f"Loading data from {path}")
+        df = read_raw(path)
+        frames.append(df)
+        versions.extend(f"{landed_at[path]:020d}/{row:012d}" for row in range(len(df)))
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return df, np.asarray(versions, dtype=object)
+
+
+@stage("clean_partition")
+def clean_partition(partition_path, staging_path, config, dedup_index=None):
+    """
+    Map step: load one date/format partition, drop its duplicates and stage it as Parquet.
+
+    Parameters:
+    partition_path (str): Landed <date>/<FORMAT> partition.
+    staging_path (str): Folder of the staged partitions.
+    config (dict): Cleaning configuration (see conf).
+    dedup_index (str): Optional dedup index file. The partition's rows are recorded as the latest records
+                       of their customers, unless a file landed later already holds a newer one.
+
+    Returns:
+    str: Path of the staged partition.
+    """
+    if dedup_index:
+        index = DedupIndex(dedup_index)
+        data, versions = load_partition(partition_path, index)
+        processor = DataProcessor(partition_path, config, df=data, show_summary=False)
+    else:
+        processor = DataProcessor(partition_path, config, show_summary=False)
+    df = processor.prepare_partition()
+    staged_path = staged_partition_path(partition_path, staging_path)
+    write_table(df, staged_path, metadata={"stage": "clean_partition", "partition": partition_path})
+    if dedup_index:
+        # drop_duplicates keeps the index labels, i.e. the positions in the loaded partition
+        latest = index.update_latest(df, partition=os.path.basename(staged_path), versions=versions[df.index])
+        logger.info(f"{latest} of {len(df)} rows of {partition_path} are the latest record of their customer")
+    return staged_path
+
+
+@stage("merge_partitions")
+def merge_partitions(staged_paths, output_path, config, export_csv=False, return_data=False, dedup_index=None):
+    """
+    Reduce step: merge the staged partitions, then impute, map and scale with statistics over all of them.
+
+    Parameters:
+    staged_paths (list): Staged partitions returned by clean_partition.
+    output_path (str): Folder for the processed outputs (see process).
+    config (dict): Cleaning configuration (see conf).
+    dedup_index (str): Optional dedup index file filled by clean_partition. Only the latest record of each
+                       customer is kept (latest wins) and the full-history drop_duplicates is skipped.
+    """
+    staged_paths = list(staged_paths)  # mapped task outputs arrive lazily from Airflow
+    if not staged_paths:
+        raise ValueError("No staged partitions to merge, check that data was landed and cleaned")
+    if dedup_index:
+        index = DedupIndex(dedup_index)
+        frames = [index.filter_latest(read_table(path), os.path.basename(path)) for path in staged_paths]
+    else:
+        frames = [read_table(path) for path in staged_paths]
+    logger.info(f"Merging {len(frames)} staged partitions ({sum(map(len, frames))} rows)")
+    # The index already kept one record per customer; the saved config stays the one the user chose
+    processor = DataProcessor(None, config, df=pd.concat(frames), remove_duplicates=not dedup_index)
+    processor.process()
+    save_outputs(processor, output_path, export_csv)
+    if return_data:
+        return processor.preprocessed_df
@@ -1,32 +1,40 @@
-import json
 import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from cleaning.utils.logger import logger
+from common.utils.raw import read_raw
+from common.utils.instrumentation import timed
 
 
 
 class DataProcessor:
-    def __init__(self, path, config):
+    def __init__(self, path, config, df=None, show_summary=True, remove_duplicates=True):
         """
         Initialize the DataProcessor with the dataset.
 
         Parameters:
         filepath (str): Path to the CSV file containing the dataset.
         config (dict): Config for data fields
+        df (pd.DataFrame): Already loaded data (e.g. merged partitions). Skips loading from path.
+        show_summary (bool): Print the initial data summary.
+        remove_duplicates (bool): Drop duplicate rows. Disabled when the rows were already deduplicated
+                                  against the persistent dedup index (see cleaning.main.merge_partitions).
         """
+        self.remove_duplicates = remove_duplicates
         self.df = None
         self.cleaned_df = None
         self.preprocessed_df = None
         self.config = config
         self.scaler = None
         self.scaler_mapping = None
-        self.__load_data(path)
-        self.display_initial_summary()
+        if df is not None:
+            self.df = df
+        else:
+            self.__load_data(path)
+        if show_summary:
+            self.display_initial_summary()
 
+    @timed("DataProcessor.load_data")
     def __load_data(self, path):
         # Load data from data folders
         for folder in os.walk(path):
@@ -40,16 +48,13 @@ class DataProcessor:
             for file in files:
                 file_path = os.path.join(folder[0], file).__str__()
                 logger.info(f"Loading data from {file_path}")
-                if source_type == 'CSV':
-                    df = pd.read_csv(file_path)
-                else:
-                    with open(file_path, 'r') as f:
-                        df = pd.DataFrame(json.load(f))
+                # Landed files may be compressed (.csv.gz, .json.zst, ...), they are decompressed as a stream
+                df = read_raw(file_path)
                 if isinstance(self.df, pd.DataFrame):
                     self.df = pd.concat([self.df, df])
                 else:
                     self.df = df
-
+        return self.df
 
     def display_initial_summary(self):
         """
@@ -62,11 +67,14 @@ class DataProcessor:
         print("\nSummary Statistics:")
         print(self.df.describe(include='all'))
 
+    @timed("DataProcessor.remove_duplicates")
     def __remove_duplicates(self):
         """
-        Remove duplicate rows from the dataset.
+        Remove duplicate rows from the dataset, unless disabled with remove_duplicates=False.
         This method uses the pandas drop_duplicates function.
         """
+        if not self.remove_duplicates:
+            return self.df
         initial_shape = self.df.shape
         self.df.drop_duplicates(inplace=True)
         final_shape = self.df.shape
@@ -90,6 +98,7 @@ class DataProcessor:
         logger.info(f"Irrelevant fields {irrelevant_fields} removed.")
         return df
 
+    @timed("DataProcessor.clean_data")
     def __clean_data(self):
         """
         Clean the data by handling missing values, converting data types, and removing duplicates if configured.
@@ -142,6 +151,7 @@ class DataProcessor:
         logger.info("Data cleaning completed.")
         return df
 
+    @timed("DataProcessor.preprocess_data")
     def __preprocess_data(self):
         """
         Preprocess the data by standardizing numerical features and converting binary/categorical columns
@@ -152,12 +162,6 @@ class DataProcessor:
             return
 
         df = self.cleaned_df.copy()
-        # Remove duplicates if enabled in config (default True)
-        remove_dups = self.config.get("remove_duplicates", True)
-        if remove_dups:
-            initial_shape = df.shape
-            df.drop_duplicates(inplace=True)
-            logger.info(f"Duplicates removed in clean_data: {initial_shape[0] - df.shape[0]} duplicate rows dropped.")
 
         numerical_cols = self.config.get("numerical_columns", [])
         binary_cols = self.config.get("binary_columns", [])
@@ -170,7 +174,9 @@ class DataProcessor:
                 mapping = self.categorical_mappings[col]["mapping"]
                 df[col] = df[col].map(mapping)
 
-        # Standardize numerical features using the specified scaling method
+        # Standardize numerical features using the specified scaling method.
+        # sklearn is imported here so partition-level cleaning tasks do not pay for it.
+        from sklearn.preprocessing import StandardScaler, MinMaxScaler
         scaling_method = self.config.get("scaling_method", "StandardScaler")
         if scaling_method == "StandardScaler":
             scaler = StandardScaler()
@@ -264,6 +270,18 @@ class DataProcessor:
 
         return df
 
+    @timed("DataProcessor.prepare_partition")
+    def prepare_partition(self):
+        """
+        Partition-local part of cleaning: drop duplicate rows and convert TotalCharges to numeric.
+        Imputation, mappings and scaling need statistics of all partitions and run after the merge.
+        """
+        self.__remove_duplicates()
+        if "TotalCharges" in self.df.columns:
+            self.df['TotalCharges'] = pd.to_numeric(self.df['TotalCharges'], errors='coerce')
+        return self.df
+
+    @timed("DataProcessor.process")
     def process(self, config:dict=None):
         if config:
             self.config = config
@@ -286,6 +304,9 @@ class DataProcessor:
         if column not in self.df.columns:
             logger.info(f"Column {column} not found in the dataset.")
             return
+        # Plotting libraries take seconds to import and are only needed for interactive analysis
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
         plt.figure(figsize=(8, 4))
         sns.histplot(self.df[column], bins=bins, kde=True)
@@ -304,6 +325,8 @@ class DataProcessor:
         if column not in self.df.columns:
             logger.info(f"Column {column} not found in the dataset.")
             return
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
         plt.figure(figsize=(8, 4))
         sns.boxplot(x=self.df[column])
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+
+class DedupIndex:
+    def __init__(self, path:str, key:str="customerID"):
+        """
+        Persistent deduplication index shared by ingestion and cleaning, stored in a sqlite file.
+
+        rows       hash of every row landed so far, used by ingestion to skip rows it already landed
+        files      landing time of every landed file, recorded by ingestion; it orders the records of a customer
+        customers  key -> latest record (staged partition, row position, version and row hash), used by
+                   cleaning to keep only the latest record of every customer (latest wins)
+
+        Lookups and updates touch only the rows of the new data, the history stays on disk.
+        Put the file on storage shared by all workers; mapped tasks may update it concurrently.
+
+        :param path: sqlite file, created on first use
+        :param key: Customer key column
+        """
+        self.path = path
+        self.key = key
+
+    @contextmanager
+    def __connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS rows (hash INTEGER PRIMARY KEY)")
+            connection.execute("CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, landed_at INTEGER)")
+            connection.execute("CREATE TABLE IF NOT EXISTS customers (customer_id TEXT PRIMARY KEY, partition TEXT, "
+                               "row INTEGER, version TEXT, row_hash INTEGER)")
+            connection.execute("CREATE INDEX IF NOT EXISTS customers_partition ON customers (partition)")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def value_hashes(series:pd.Series):
+        """
+        64-bit hash of every value that does not depend on how the column was parsed: numbers hash by value
+        whether they came as int, float or string ("20", 20, 20.0 and "20.0" hash the same), other values
+        by their text with surrounding blanks stripped, and missing or blank values hash the same.
+        """
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            numbers = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            text = np.full(len(series), "", dtype=object)
+        else:
+            # Parse each distinct value once, categorical columns only hold a handful
+            codes, uniques = pd.factorize(series.astype(object).where(series.notna(), "").astype(str).str.strip())
+            text = uniques.to_numpy(dtype=object)[codes]
+            parsed = pd.to_numeric(pd.Series(uniques, dtype=object).where(uniques != ""), errors="coerce")
+            numbers = parsed.to_numpy(dtype=np.float64)[codes]
+        is_number = ~np.isnan(numbers)
+        # + 0.0 folds -0.0 into 0.0
+        return np.where(is_number, pd.util.hash_array(np.where(is_number, numbers, 0.0) + 0.0),
+                        pd.util.hash_array(np.where(is_number, "", text).astype(object)))
+
+    @classmethod
+    def row_hashes(cls, df:pd.DataFrame):
+        """
+        64-bit hash of every row over its value hashes (see value_hashes), independent of column order and
+        dtype, so a record hashes the same whether it came from a CSV (typed, with dtypes inferred per file
+        or chunk) or the API (strings). Stable across processes.
+        """
+        values = pd.DataFrame({col: cls.value_hashes(df[col]) for col in sorted(df.columns)}, index=df.index)
+        # sqlite integers are signed 64-bit
+        return pd.util.hash_pandas_object(values, index=False).to_numpy().view(np.int64)
+
+    def unseen(self, df:pd.DataFrame):
+        """
+        Boolean mask of the rows whose hash is not in the index yet (first occurrence within df only).
+        """
+        hashes = self.row_hashes(df)
+        with self.__connect() as connection:
+            connection.execute("CREATE TEMP TABLE incoming (hash INTEGER PRIMARY KEY)")
+            connection.executemany("INSERT OR IGNORE INTO incoming VALUES (?)", ((int(h),) for h in hashes))
+            seen = {h for h, in connection.execute("SELECT hash FROM incoming JOIN rows USING (hash)")}
+        mask = ~pd.Series(hashes).isin(seen).to_numpy()
+        return mask & ~pd.Series(hashes).duplicated().to_numpy()
+
+    def add(self, df:pd.DataFrame):
+        """
+        Record the rows of df as landed.
+        """
+        with self.__connect() as connection:
+            connection.executemany("INSERT OR IGNORE INTO rows VALUES (?)", ((int(h),) for h in self.row_hashes(df)))
+
+    def record_file(self, path:str, landed_at:int=None):
+        """
+        Record when a raw file was landed (ns since the epoch, default now). Landed file names are unique.
+        """
+        landed_at = time.time_ns() if landed_at is None else landed_at
+        with self.__connect() as connection:
+            connection.execute("INSERT OR IGNORE INTO files VALUES (?, ?)", (os.path.basename(path), landed_at))
+
+    def landed_at(self, paths:list):
+        """
+        Landing time of every landed file, in ns since the epoch. Files landed before the index existed fall
+        back to their modification time, which DataStorage sets when it writes the file.
+
+        :return: dict path -> landing time
+        """
+        with self.__connect() as connection:
+            recorded = dict(connection.execute("SELECT name, landed_at FROM files"))
+        return {path: recorded.get(os.path.basename(path), os.stat(path).st_mtime_ns) for path in paths}
+
+    def update_latest(self, df:pd.DataFrame, partition:str, versions):
+        """
+        Record the rows of a staged partition as the latest records of their customers, unless a newer
+        version is already indexed. The previous entries of the partition are replaced, so re-cleaning a
+        partition never leaves pointers to rows that moved.
+
+        :param df: Staged partition, in the row order it was written
+        :param partition: Staged partition path, returned by latest_rows
+        :param versions: Sortable version of every row of df, e.g. its file's landing time and its row in
+                         that file (see cleaning.main.load_partition); equal versions are won by the later row
+        :return: Number of customers whose latest record is now in this partition
+        """
+        hashes = self.row_hashes(df)
+        records = [(str(customer_id), partition, row, versions[row], int(hashes[row]))
+                   for row, customer_id in enumerate(df[self.key].to_numpy()) if pd.notna(customer_id)]
+        with self.__connect() as connection:
+            connection.execute("DELETE FROM customers WHERE partition = ?", (partition,))
+            connection.executemany(
+                "INSERT INTO customers VALUES (?, ?, ?, ?, ?) ON CONFLICT (customer_id) DO UPDATE SET "
+                "partition = excluded.partition, row = excluded.row, version = excluded.version, "
+                "row_hash = excluded.row_hash WHERE excluded.version >= customers.version", records)
+            return connection.execute("SELECT COUNT(*) FROM customers WHERE partition = ?", (partition,)).fetchone()[0]
+
+    def latest_rows(self, partition:str):
+        """
+        Row positions of the staged partition that hold the latest record of their customer.
+        """
+        with self.__connect() as connection:
+            rows = [row for row, in connection.execute("SELECT row FROM customers WHERE partition = ?", (partition,))]
+        return np.sort(np.asarray(rows, dtype=np.int64))
+
+    def filter_latest(self, df:pd.DataFrame, partition:str):
+        """
+        Keep the rows of a staged partition that are the latest record of their customer, plus rows without
+        a customer key.
+        """
+        keep = np.zeros(len(df), dtype=bool)
+        keep[self.latest_rows(partition)] = True
+        keep |= df[self.key].isna().to_numpy()
+        return df[keep]
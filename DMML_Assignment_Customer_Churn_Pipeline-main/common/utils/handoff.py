@@ -0,0 +1,74 @@
+import json
+import os
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Schema metadata key holding the pipeline metadata (stage, config, scaler mapping, ...)
+METADATA_KEY = b"dmml"
+
+
+def _normalize_mixed_columns(df:pd.DataFrame):
+    """
+    Give object columns holding mixed types (e.g. ints from CSV sources and strings from JSON sources)
+    a single type, as a CSV round trip would: numeric if every value parses, string otherwise.
+    """
+    mixed = [col for col in df.columns
+             if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed")]
+    if not mixed:
+        return df
+    df = df.copy()
+    for col in mixed:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def write_table(df:pd.DataFrame, path:str, metadata:dict=None, export_csv:bool=False):
+    """
+    Write a stage output as Parquet, the hand-off format between pipeline stages.
+
+    Parameters:
+    df (pd.DataFrame): Stage output.
+    path (str): Parquet file path.
+    metadata (dict): JSON-serializable metadata stored in the file schema (stage, config, ...).
+    export_csv (bool): Also write a CSV copy next to the Parquet file for manual inspection.
+
+    Returns:
+    str: The Parquet file path.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(_normalize_mixed_columns(df), preserve_index=False)
+    metadata = dict(metadata or {}, written_at=datetime.now().isoformat())
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[METADATA_KEY] = json.dumps(metadata, default=str).encode()
+    table = table.replace_schema_metadata(schema_metadata)
+    # Write next to the target and rename so readers never open a partially written file
+    pq.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    if export_csv:
+        df.to_csv(os.path.splitext(path)[0] + ".csv", index=False)
+    return path
+
+
+def read_table(path:str, columns:list=None):
+    """
+    Read a stage output. Parquet is read column-wise (only `columns` if given); CSV is still accepted
+    for older outputs and manual exports.
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=columns)
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def read_metadata(path:str):
+    """
+    Return the pipeline metadata stored in a Parquet stage output, without reading its data.
+    """
+    schema_metadata = pq.read_schema(path).metadata or {}
+    if METADATA_KEY not in schema_metadata:
+        return {}
+    return json.loads(schema_metadata[METADATA_KEY])
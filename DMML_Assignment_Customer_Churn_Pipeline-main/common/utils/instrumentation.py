@@ -0,0 +1,257 @@
+import functools
+import json
+import os
+import resource
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, RSS is read from /proc on Linux without it
+    psutil = None
+
+# Folder of the per-run metrics files, overridable per deployment
+METRICS_DIR = os.environ.get("PIPELINE_METRICS_DIR", "../logs/metrics")
+# Interval of the RSS sampling behind a stage's peak RSS
+RSS_SAMPLE_INTERVAL_S = 0.02
+RUN_FILE = "run.json"
+
+
+def _rss_mb():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return None
+
+
+class _PeakSampler(threading.Thread):
+    def __init__(self):
+        # Samples the process RSS until stopped; ru_maxrss is a high-water mark since process start and
+        # says nothing about the stage that is running now
+        super().__init__(daemon=True)
+        self.peak = _rss_mb()
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while not self.__stopped.wait(RSS_SAMPLE_INTERVAL_S):
+            rss = _rss_mb()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def stop(self):
+        self.__stopped.set()
+        self.join()
+        rss = _rss_mb()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return self.peak
+
+
+def _measure(value):
+    # Rows and in-memory bytes of a DataFrame (or of the first DataFrame in a tuple)
+    if isinstance(value, tuple):
+        value = next((item for item in value if hasattr(item, "memory_usage")), None)
+    if value is None or not hasattr(value, "memory_usage") or not hasattr(value, "__len__"):
+        return None, None
+    usage = value.memory_usage(index=False)
+    return len(value), int(usage.sum() if hasattr(usage, "sum") else usage)
+
+
+class Span:
+    def __init__(self, name:str, parent:str=None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.record = None
+
+    def set(self, **attributes):
+        """
+        Attach counters to the span, e.g. span.set(rows=len(df), bytes=size).
+        """
+        self.attributes.update(attributes)
+
+
+class Instrumentation:
+    def __init__(self):
+        """
+        Collects timing and resource spans of the current pipeline run and exports them as JSON.
+
+        Spans recorded inside a stage belong to that stage and are exported with it; spans outside any stage
+        are kept in spans until export() writes them.
+        """
+        self.__local_run_id = datetime.now().strftime("%Y%m%dT%H%M%S") + "_" + uuid.uuid4().hex[:8]
+        self.spans = []
+        self.__lock = threading.Lock()
+        self.__stack = threading.local()
+        # Stage name -> number of running calls, and running stage -> stages that ran at the same time
+        self.__active = {}
+        self.__overlaps = {}
+
+    @property
+    def run_id(self):
+        # Airflow only sets the run context when the task executes, long after this module is imported
+        return os.environ.get("AIRFLOW_CTX_DAG_RUN_ID") or self.__local_run_id
+
+    @contextmanager
+    def span(self, name:str, **attributes):
+        """
+        Record wall time, CPU time and RSS at the start and end of a block of code.
+        """
+        stack = self.__stack.__dict__.setdefault("names", [])
+        span = Span(name, parent=stack[-1] if stack else None, **attributes)
+        stack.append(name)
+        started_at = datetime.now().isoformat()
+        rss_start = _rss_mb()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        status = "ok"
+        try:
+            yield span
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            stack.pop()
+            span.record = dict({
+                "name": name,
+                "parent": span.parent,
+                "status": status,
+                "started_at": started_at,
+                "wall_s": time.perf_counter() - wall_start,
+                "cpu_s": time.process_time() - cpu_start,
+                "rss_start_mb": rss_start,
+                "rss_end_mb": _rss_mb()
+            }, **span.attributes)
+            collectors = self.__stack.__dict__.get("stages")
+            if collectors:
+                collectors[-1].append(span.record)
+            else:
+                with self.__lock:
+                    self.spans.append(span.record)
+
+    def timed(self, name:str=None):
+        """
+        Decorator recording a span per call. Rows and bytes are taken from the first DataFrame argument
+        (rows_in/bytes_in) and from a DataFrame result (rows_out/bytes_out).
+        """
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name) as span:
+                    rows, size = next((m for m in map(_measure, args) if m[0] is not None), (None, None))
+                    if rows is not None:
+                        span.set(rows_in=rows, bytes_in=size)
+                    result = func(*args, **kwargs)
+                    rows, size = _measure(result)
+                    if rows is not None:
+                        span.set(rows_out=rows, bytes_out=size)
+                    return result
+            return wrapper
+        return decorator
+
+    def stage(self, name:str):
+        """
+        Decorator for pipeline stage entry points: records the stage span with the peak RSS sampled while it
+        ran, and exports the spans of this call when the stage finishes, also when it fails.
+
+        The RSS is the process's: stages that ran in the same process at the same time are listed in
+        overlapping_stages, their peaks include each other's memory.
+        """
+        def decorator(func):
+            timed = self.timed(name)(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                collectors = self.__stack.__dict__.setdefault("stages", [])
+                spans = []
+                collectors.append(spans)
+                with self.__lock:
+                    overlapping = {stage for stage, count in self.__active.items() if count}
+                    self.__active[name] = self.__active.get(name, 0) + 1
+                    for stage in overlapping:
+                        self.__overlaps.setdefault(stage, set()).add(name)
+                    self.__overlaps.setdefault(name, set()).update(overlapping)
+                sampler = _PeakSampler()
+                sampler.start()
+                try:
+                    return timed(*args, **kwargs)
+                finally:
+                    peak = sampler.stop()
+                    collectors.pop()
+                    with self.__lock:
+                        self.__active[name] -= 1
+                        overlaps = self.__overlaps.get(name, set())
+                        if not self.__active[name]:
+                            # Running stages drop the name from their own overlaps only once they finish
+                            self.__overlaps.pop(name, None)
+                    spans[-1].update(peak_rss_mb=peak, overlapping_stages=sorted(overlaps - {name}))
+                    self.export(stage=name, spans=spans)
+            return wrapper
+        return decorator
+
+    def export(self, path:str=None, stage:str=None, spans:list=None):
+        """
+        Write spans to JSON.
+
+        :param path: Output file. Defaults to <METRICS_DIR>/<run_id>/<stage>_<pid>_<id>.json
+        :param stage: Stage name used for the default file name
+        :param spans: Spans to write. Defaults to the spans recorded outside stages, which are then cleared
+        """
+        if path is None:
+            path = os.path.join(self.run_dir(), f"{stage or 'run'}_{os.getpid()}_{uuid.uuid4().hex[:8]}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if spans is None:
+            with self.__lock:
+                spans, self.spans = self.spans, []
+        with open(path, "w") as f:
+            json.dump({"run_id": self.run_id, "stage": stage, "pid": os.getpid(), "spans": spans}, f, indent=2,
+                      default=str)
+        return path
+
+    def run_dir(self, run_id:str=None):
+        return os.path.join(METRICS_DIR, (run_id or self.run_id).replace(":", "_"))
+
+    def merge(self, run_id:str=None):
+        """
+        Merge the stage files of a run into <METRICS_DIR>/<run_id>/run.json: every stage call with its
+        wall time, CPU time and peak RSS, and all spans. Stages may have run in other processes or workers,
+        as long as they share METRICS_DIR.
+
+        :param run_id: Run to merge, defaults to the current one
+        :return: Path of run.json
+        """
+        run_dir = self.run_dir(run_id)
+        files = sorted(file for file in os.listdir(run_dir) if file.endswith(".json") and file != RUN_FILE) \
+            if os.path.isdir(run_dir) else []
+        stages, spans = [], []
+        for file in files:
+            with open(os.path.join(run_dir, file)) as f:
+                exported = json.load(f)
+            spans.extend(exported["spans"])
+            if exported.get("stage") and exported["spans"]:
+                record = exported["spans"][-1]
+                stages.append({key: record.get(key) for key in
+                               ("name", "status", "started_at", "wall_s", "cpu_s", "peak_rss_mb",
+                                "overlapping_stages")})
+        stages.sort(key=lambda record: record["started_at"])
+        path = os.path.join(run_dir, RUN_FILE)
+        os.makedirs(run_dir, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"run_id": run_id or self.run_id, "stages": stages, "spans": spans}, f, indent=2,
+                      default=str)
+        return path
+
+
+# Process-wide instrumentation shared by every stage
+metrics = Instrumentation()
+span = metrics.span
+timed = metrics.timed
+stage = metrics.stage
+merge_metrics = metrics.merge
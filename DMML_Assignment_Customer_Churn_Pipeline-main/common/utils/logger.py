@@ -0,0 +1,72 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+
+class _LazyQueueHandler(QueueHandler):
+    def __init__(self, path:str, name:str):
+        """
+        Queue handler that creates the log folder, the file handler and the listener thread when the first
+        record is logged, so importing a module that defines a logger has no side effects.
+        """
+        super().__init__(queue.SimpleQueue())
+        self.path = path
+        self.log_name = name
+        self.listener = None
+        self.__start_lock = threading.Lock()
+
+    def __start(self):
+        os.makedirs(self.path, exist_ok=True)
+        # Create handlers
+        console_handler = logging.StreamHandler()  # Logs to terminal
+        filename = f'{self.log_name}_log_{datetime.now().strftime("%Y%m%d")}.log'
+        file_handler = logging.FileHandler(os.path.join(self.path, filename))  # Logs to file
+        # Set logging format
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        console_handler.setFormatter(formatter)
+        file_handler.setFormatter(formatter)
+        # Stage code only enqueues records, the listener thread does the I/O
+        listener = QueueListener(self.queue, console_handler, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        self.listener = listener
+
+    def enqueue(self, record):
+        if self.listener is None:
+            with self.__start_lock:
+                if self.listener is None:
+                    self.__start()
+        super().enqueue(record)
+
+
+class Logger:
+    # One queue handler per named logger, so repeated calls never stack handlers
+    _handlers = {}
+
+    @staticmethod
+    def get_logger(path="../logs", name:str=''):
+        """
+        Return the logger of a pipeline stage.
+
+        Records are put on an in-memory queue and written to the console and to
+        <path>/<name>_log_<date>.log by a background listener thread, so logging never blocks the stage.
+        The folder, the log file and the thread are only created once the first record is logged.
+        Calling this again for the same name returns the already configured logger.
+
+        :param path: Log folder
+        :param name: Stage name, also the logger name and the log file prefix
+        """
+        logger = logging.getLogger(name)
+        if name in Logger._handlers:
+            return logger
+        handler = _LazyQueueHandler(path, name)
+        Logger._handlers[name] = handler
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        # Keep records away from root handlers (e.g. Airflow's), which would print them twice
+        logger.propagate = False
+        return logger
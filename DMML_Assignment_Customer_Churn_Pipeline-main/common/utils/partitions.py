@@ -0,0 +1,14 @@
+import os
+
+SOURCE_TYPES = ("CSV", "JSON")
+
+
+def list_partitions(source_path:str):
+    """
+    List the landed date/format partitions (<source_path>/<date>/<CSV|JSON>), oldest first.
+    """
+    partitions = []
+    for folder, _, files in os.walk(source_path):
+        if os.path.basename(folder) in SOURCE_TYPES and files:
+            partitions.append(folder)
+    return sorted(partitions)
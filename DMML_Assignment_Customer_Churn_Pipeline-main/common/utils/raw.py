@@ -0,0 +1,103 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+# File extension of each codec, as recorded in the landed file names (e.g. <uuid>.csv.zst)
+CODECS = {"zstd": "zst", "gzip": "gz"}
+EXTENSIONS = {ext: codec for codec, ext in CODECS.items()}
+CHUNK_SIZE = 1 << 20
+
+
+def default_codec():
+    # zstd decompresses several times faster than gzip at a similar ratio on the Telco text data
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def split_extension(path:str):
+    """
+    Split a raw file path into (path without extensions, format, codec),
+    e.g. "a/b.csv.gz" -> ("a/b", "csv", "gzip") and "a/b.json" -> ("a/b", "json", None).
+    """
+    stem, ext = os.path.splitext(path)
+    codec = EXTENSIONS.get(ext.lstrip("."))
+    if codec:
+        stem, ext = os.path.splitext(stem)
+    return stem, ext.lstrip(".").lower(), codec
+
+
+def compress_file(source:str, destination:str, codec:str=None):
+    """
+    Copy a file, compressing it as a stream. The codec extension is appended to the destination.
+
+    :param source: Uncompressed file
+    :param destination: Target path without the codec extension
+    :param codec: "zstd", "gzip" or None to copy as is
+    :return: Path of the written file
+    """
+    if codec is None:
+        shutil.copy(source, destination)
+        return destination
+    path = f"{destination}.{CODECS[codec]}"
+    with open(source, "rb") as src, open(path, "wb") as dst:
+        if codec == "zstd":
+            if zstandard is None:
+                raise ImportError("zstd compression needs the zstandard package")
+            with zstandard.ZstdCompressor(level=3).stream_writer(dst, closefd=False) as writer:
+                shutil.copyfileobj(src, writer, CHUNK_SIZE)
+        else:
+            with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=6) as writer:
+                shutil.copyfileobj(src, writer, CHUNK_SIZE)
+    return path
+
+
+def open_raw(path:str, text:bool=True):
+    """
+    Open a landed raw file, decompressing it on the fly according to its extension.
+
+    :param path: Raw file, optionally ending in .gz or .zst
+    :param text: Return a text (utf-8) stream instead of a binary one
+    """
+    codec = split_extension(path)[2]
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError(f"{path} is zstd compressed, install the zstandard package to read it")
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_size=CHUNK_SIZE, closefd=True)
+    elif codec == "gzip":
+        stream = gzip.open(path, "rb")
+    else:
+        stream = open(path, "rb")
+    return io.TextIOWrapper(stream, encoding="utf-8") if text else stream
+
+
+def read_raw(path:str):
+    """
+    Read a landed CSV or JSON file, compressed or not, into a DataFrame.
+    """
+    source_type = split_extension(path)[1]
+    with open_raw(path, text=source_type == "json") as f:
+        if source_type == "json":
+            return pd.DataFrame(json.load(f))
+        return pd.read_csv(f)
+
+
+def iter_raw(path:str, chunksize:int=100_000, dtype=None):
+    """
+    Stream a landed CSV file in DataFrame chunks of at most chunksize rows, decompressing on the fly.
+    JSON files are one array and are yielded as a single DataFrame.
+
+    :param dtype: Passed to read_csv. Without it dtypes are inferred per chunk, e.g. TotalCharges is text in
+                  chunks with a blank value and float in the others; dtype=str keeps every value as written
+    """
+    if split_extension(path)[1] == "json":
+        yield read_raw(path)
+        return
+    with open_raw(path, text=False) as f:
+        yield from pd.read_csv(f, chunksize=chunksize, dtype=dtype)
@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+from common.utils.dedup import DedupIndex
+from common.utils.instrumentation import stage
+from common.utils.partitions import list_partitions
+from common.utils.raw import iter_raw
+
+logger = logging.getLogger(__name__)
+
+MISSING = "__missing__"
+KEY, SOURCE, ROW = "__sample_key", "__sample_source", "__sample_row"
+
+
+class ColumnStatistics:
+    def __init__(self, numerical_columns:list, categorical_columns:list):
+        """
+        Streaming statistics behind imputation and scaling: value counts of every numerical and categorical
+        column, from which mean, std, median, min/max (scalers, numerical imputation) and the mode and
+        proportions (categorical imputation) are derived exactly.
+        """
+        self.numerical_columns = list(numerical_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.counts = {}
+        self.missing = {}
+        self.rows = 0
+
+    def add(self, df:pd.DataFrame):
+        self.rows += len(df)
+        for col in self.numerical_columns + self.categorical_columns:
+            if col not in df.columns:
+                continue
+            values = df[col]
+            if col in self.numerical_columns:
+                # Same conversion as cleaning, e.g. blank TotalCharges become missing
+                values = pd.to_numeric(values, errors="coerce")
+            else:
+                values = values.where(values.isna(), values.astype(str))
+            counts = values.value_counts()
+            self.counts[col] = counts if col not in self.counts else self.counts[col].add(counts, fill_value=0)
+            self.missing[col] = self.missing.get(col, 0) + int(values.isna().sum())
+        return self
+
+    def summary(self):
+        summary = {}
+        for col, counts in self.counts.items():
+            total = counts.sum()
+            column = {"missing_rate": self.missing[col] / self.rows if self.rows else None}
+            if col in self.numerical_columns and total:
+                counts = counts.sort_index()
+                values, weights = counts.index.to_numpy(dtype=np.float64), counts.to_numpy(dtype=np.float64)
+                mean = np.average(values, weights=weights)
+                cumulative = np.cumsum(weights)
+                # Median as pandas computes it: average of the two middle values for an even count
+                lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+                upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+                column.update({
+                    "mean": mean,
+                    "std": float(np.sqrt(np.average((values - mean) ** 2, weights=weights))),
+                    "median": (lower + upper) / 2,
+                    "min": values[0],
+                    "max": values[-1]
+                })
+            elif total:
+                column.update({"mode": counts.idxmax(), "proportions": (counts / total).to_dict()})
+            summary[col] = column
+        return summary
+
+    @staticmethod
+    def deviation(sample:dict, full:dict):
+        """
+        Deviation of sample statistics from full-data statistics, per column.
+
+        Numerical: absolute and relative difference of mean, std, median, min and max, and the standardized
+        mean difference |mean_sample - mean_full| / std_full. Categorical: whether the imputation mode is the same
+        and the total variation distance of the value proportions.
+        """
+        report = {}
+        for col, reference in full.items():
+            observed = sample.get(col, {})
+            column = {"missing_rate": {"sample": observed.get("missing_rate"), "full": reference["missing_rate"]}}
+            if "mean" in reference and "mean" in observed:
+                for stat in ("mean", "std", "median", "min", "max"):
+                    diff = abs(observed[stat] - reference[stat])
+                    column[stat] = {"sample": float(observed[stat]), "full": float(reference[stat]),
+                                    "abs_diff": float(diff),
+                                    "rel_diff": float(diff / abs(reference[stat])) if reference[stat] else None}
+                column["standardized_mean_diff"] = float(abs(observed["mean"] - reference["mean"]) / reference["std"]) \
+                    if reference["std"] else None
+            elif "mode" in reference:
+                values = set(reference["proportions"]) | set(observed.get("proportions", {}))
+                column["mode"] = {"sample": observed.get("mode"), "full": reference["mode"],
+                                  "match": observed.get("mode") == reference["mode"]}
+                column["total_variation_distance"] = 0.5 * sum(
+                    abs(observed.get("proportions", {}).get(value, 0) - reference["proportions"].get(value, 0))
+                    for value in values)
+            report[col] = column
+        return report
+
+
+class StratifiedReservoirSampler:
+    def __init__(self, size:int, stratify:str="Churn", seed:int=42):
+        """
+        Stratified reservoir sample of at most `size` rows in one pass over a stream of DataFrames.
+
+        Every row gets a pseudo-random key derived from its content and the seed, and each stratum keeps its
+        `size` smallest keys. At the end the sample size is split across strata in proportion to the rows seen
+        and each stratum contributes its smallest keys. The sample therefore depends only on the data and the
+        seed, not on chunk sizes or partition order. Memory is bounded by `size` rows per stratum.
+
+        :param size: Sample size
+        :param stratify: Column whose class proportions the sample preserves
+        :param seed: Seed of the row keys
+        """
+        self.size = size
+        self.stratify = stratify
+        self.seed = seed
+        self.reservoirs = {}
+        self.counts = {}
+        self.sources = 0
+
+    def keys(self, df:pd.DataFrame):
+        mix = np.uint64((self.seed * 0x9E3779B97F4A7C15 + 1) % 2 ** 64)
+        return pd.util.hash_array(DedupIndex.row_hashes(df).view(np.uint64) ^ mix)
+
+    def add(self, df:pd.DataFrame):
+        """
+        Feed the next chunk of the stream. Chunks are numbered so the sample keeps the stream order.
+        """
+        df = df.assign(**{KEY: self.keys(df), SOURCE: self.sources, ROW: np.arange(len(df))})
+        self.sources += 1
+        strata = df[self.stratify].astype(object).where(df[self.stratify].notna(), MISSING).astype(str)
+        for stratum, rows in df.groupby(strata.to_numpy(), sort=False):
+            self.counts[stratum] = self.counts.get(stratum, 0) + len(rows)
+            reservoir = self.reservoirs.get(stratum)
+            reservoir = rows if reservoir is None else pd.concat([reservoir, rows], ignore_index=True)
+            if len(reservoir) > self.size:
+                reservoir = reservoir.nsmallest(self.size, KEY)
+            self.reservoirs[stratum] = reservoir
+        return self
+
+    def allocation(self):
+        # Proportional allocation with largest remainders, so the sizes add up to the sample size
+        total = sum(self.counts.values())
+        size = min(self.size, total)
+        shares = {stratum: size * count / total for stratum, count in self.counts.items()}
+        allocation = {stratum: int(share) for stratum, share in shares.items()}
+        remainders = sorted(shares, key=lambda stratum: shares[stratum] - allocation[stratum], reverse=True)
+        for stratum in remainders[:size - sum(allocation.values())]:
+            allocation[stratum] += 1
+        return allocation
+
+    def sample(self):
+        """
+        Return the sample in stream order.
+        """
+        allocation = self.allocation()
+        frames = [self.reservoirs[stratum].nsmallest(k, KEY) for stratum, k in allocation.items() if k]
+        if not frames:
+            return pd.DataFrame()
+        sample = pd.concat(frames, ignore_index=True).sort_values([SOURCE, ROW], kind="stable")
+        return sample.drop(columns=[KEY, SOURCE, ROW]).reset_index(drop=True)
+
+
+@stage("sample")
+def sample_partitions(source_path:str, sample_path:str, size:int, config:dict, seed:int=42, stratify:str="Churn",
+                      chunksize:int=100_000):
+    """
+    Draw a reproducible, stratified reservoir sample of the landed partitions in one streaming pass and land it
+    as a partition under sample_path, so validation, cleaning and training run on it unchanged.
+
+    Statistics of the full data and of the sample are collected in the same pass and their deviation is
+    written to <sample_path>/sample_report.json, to judge how representative the sample is for the scaler and
+    imputation statistics.
+
+    :param source_path: Root of the landed raw partitions
+    :param sample_path: Root of the sampled partition, owned by this stage
+    :param size: Sample size
+    :param config: Cleaning configuration, its numerical, binary and categorical columns are compared
+    :param seed: Sample seed
+    :param stratify: Column whose class proportions the sample preserves
+    :param chunksize: Rows read at a time from CSV files
+    :return: The deviation report
+    """
+    numerical = config.get("numerical_columns", [])
+    categorical = config.get("binary_columns", []) + config.get("categorical_columns", [])
+    sampler = StratifiedReservoirSampler(size, stratify=stratify, seed=seed)
+    full = ColumnStatistics(numerical, categorical)
+    partitions = list_partitions(source_path)
+    for partition in partitions:
+        for file in sorted(os.listdir(partition)):
+            # Values are kept as written, so neither the row keys nor the written sample depend on the
+            # dtypes read_csv would infer for a particular chunk
+            for chunk in iter_raw(os.path.join(partition, file), chunksize, dtype=str):
+                sampler.add(chunk)
+                full.add(chunk)
+    sample = sampler.sample()
+
+    # Replace the previous sample; the partition is dated like the newest landed one
+    for previous in list_partitions(sample_path):
+        for file in os.listdir(previous):
+            os.remove(os.path.join(previous, file))
+    date = os.path.basename(os.path.dirname(partitions[-1])) if partitions else "sample"
+    output_dir = os.path.join(sample_path, date, "CSV")
+    os.makedirs(output_dir, exist_ok=True)
+    sample.to_csv(os.path.join(output_dir, "sample.csv"), index=False)
+
+    full_summary = full.summary()
+    sample_summary = ColumnStatistics(numerical, categorical).add(sample).summary()
+    report = {
+        "size": len(sample),
+        "rows": full.rows,
+        "seed": seed,
+        "stratify": stratify,
+        "strata": {stratum: {"rows": sampler.counts[stratum], "sample": k}
+                   for stratum, k in sampler.allocation().items()},
+        "deviation": ColumnStatistics.deviation(sample_summary, full_summary)
+    }
+    with open(os.path.join(sample_path, "sample_report.json"), "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    for col, column in report["deviation"].items():
+        if "standardized_mean_diff" in column:
+            logger.info(f"Sample {col}: mean {column['mean']['sample']:.4g} vs {column['mean']['full']:.4g}, "
+                        f"std {column['std']['sample']:.4g} vs {column['std']['full']:.4g}, "
+                        f"median {column['median']['sample']:.4g} vs {column['median']['full']:.4g}")
+    logger.info(f"Sampled {len(sample)} of {full.rows} rows into {output_dir}")
+    return report
@@ -0,0 +1,88 @@
+import logging
+import os
+
+from cleaning.main import process, conf
+from common.utils.instrumentation import merge_metrics
+from common.utils.sampling import sample_partitions
+from ingestion.main import ingest_csv, ingest_api
+from model_training.main import train_model
+from dags.utils.runner import LocalRunner, Output
+
+# Runs the same stages as training_pipeline.py in one process, without Airflow:
+#   python -m dags.local_pipeline        (from the repository root)
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+##################
+# Ingestion Vars #
+##################
+csv_path = os.path.join(root, "Dataset", "Telco-Customer-Churn.csv")
+api_url = "https://my.api.mockaroo.com/users"
+API_HEADERS = {"X-API-Key": "2a258740"}
+raw_path = os.path.join(root, "Dataset", "Raw Data")
+storage_path = os.path.join(root, "Dataset")
+# Hashes of the rows landed so far, re-ingested rows are not landed again
+dedup_index = os.path.join(root, "Dataset", "dedup_index.sqlite")
+# Set to False for offline runs (e.g. CI smoke tests)
+ingest_from_api = os.environ.get("PIPELINE_SKIP_API", "0").lower() not in ("1", "true", "yes")
+
+##################
+# Cleaning Vars #
+##################
+source_path = os.path.join(root, "Dataset", "Customer Churn Data")
+output_path = os.path.join(root, "Dataset", "Processed Data")
+
+##################
+# Training Vars #
+##################
+data_path = os.path.join(output_path, "processed_data.parquet")
+label_column = "Churn"
+drop_columns = ["Churn", "customerID"]
+model_dir = os.path.join(root, "Models", "Customer Churn", "models")
+artifacts_dir = os.path.join(root, "Models", "Customer Churn", "artifacts")
+
+##################
+# Sampling Vars  #
+##################
+# PIPELINE_SAMPLE_SIZE=10000 cleans and trains on a Churn-stratified sample of the landed partitions, with the
+# outputs under separate "Sample" folders; unset runs on the full data
+sample = {"size": int(os.environ["PIPELINE_SAMPLE_SIZE"]), "seed": int(os.environ.get("PIPELINE_SAMPLE_SEED", 42))} \
+    if os.environ.get("PIPELINE_SAMPLE_SIZE") else None
+# Ingestion always lands into the full data
+landed_path = source_path
+if sample:
+    source_path = os.path.join(root, "Dataset", "Sample Data")
+    output_path, model_dir, artifacts_dir = (os.path.join(path, "Sample")
+                                             for path in (output_path, model_dir, artifacts_dir))
+    data_path = os.path.join(output_path, "processed_data.parquet")
+
+
+def build_runner():
+    runner = LocalRunner()
+    runner.add("ingest_csv", ingest_csv, args=(csv_path, raw_path),
+               kwargs={"storage_root": storage_path, "dedup_index": dedup_index})
+    ingestion = ["ingest_csv"]
+    if ingest_from_api:
+        runner.add("ingest_api", ingest_api, args=(api_url, API_HEADERS, raw_path),
+                   kwargs={"storage_root": storage_path, "dedup_index": dedup_index})
+        ingestion.append("ingest_api")
+    if sample:
+        # Deviation of the sample from the full-data statistics is written to <source_path>/sample_report.json
+        runner.add("sample", sample_partitions, args=(landed_path, source_path, sample["size"], conf),
+                   kwargs={"seed": sample["seed"]}, upstream=ingestion)
+    runner.add("clean", process, args=(source_path, output_path, conf), kwargs={"return_data": True},
+               upstream=["sample"] if sample else ingestion)
+    # The cleaned frame is handed over in memory instead of being read back from data_path
+    runner.add("train", train_model, args=(data_path, label_column, drop_columns, model_dir, artifacts_dir),
+               kwargs={"data": Output("clean")})
+    return runner
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    runner = build_runner()
+    try:
+        runner.run()
+    finally:
+        # One metrics file for the whole run: <PIPELINE_METRICS_DIR>/<run id>/run.json
+        print(f"Run metrics: {merge_metrics()}")
+    runner.report()
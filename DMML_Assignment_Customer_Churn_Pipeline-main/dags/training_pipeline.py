@@ -1,11 +1,17 @@
+import os
 import pendulum
 from airflow import DAG
 from airflow.operators.empty import EmptyOperator
 from airflow.operators.python import PythonOperator
 
-from cleaning.main import process, conf
+from cleaning.main import clean_partition, merge_partitions, staged_partition_path, conf
+from common.utils.instrumentation import merge_metrics
+from common.utils.partitions import list_partitions
+from common.utils.sampling import sample_partitions
 from ingestion.main import ingest_csv, ingest_api
 from model_training.main import train_model
+from validation.main import validate_partition, merge_reports, config as validation_config
+from dags.utils.stage_cache import run_cached
 
 ##################
 # Ingestion Vars #
@@ -21,16 +27,71 @@ storage_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Datase
 ##################
 source_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/Customer Churn Data"
 output_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/Processed Data"
+# Per-partition cleaning outputs, merged before training
+staging_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/Staging"
+# Row hashes and latest record per customer, shared by ingestion and cleaning (latest wins)
+dedup_index = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/dedup_index.sqlite"
+
+###################
+# Validation Vars #
+###################
+report_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/reports/Customer Churn Data"
 
 ##################
 # Training Vars #
 ##################
-data_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/Processed Data/processed_data.csv"
+data_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/Processed Data/processed_data.parquet"
 label_column = "Churn"
 drop_columns = ["Churn", "customerID"]
 model_dir = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Models/Customer Churn/models"
 artifacts_dir = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Models/Customer Churn/artifacts"
 
+################
+# Cache Vars   #
+################
+# Stage fingerprints; delete this folder to force a full re-run
+cache_dir = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/.stage_cache"
+
+##################
+# Sampling Vars  #
+##################
+# None runs on the full data. A setting such as {"size": 10000, "seed": 42} draws a Churn-stratified sample of
+# the landed partitions and runs validation, cleaning and training on it instead, writing every output under a
+# separate "Sample" folder so the production data, index and model are left alone.
+sample = None
+# Ingestion always lands into (and dedups against) the full data and uses cache_dir. The stages after it keep
+# their manifests in stage_cache_dir, separate for sample runs, so switching modes never reuses or invalidates
+# the other mode's results.
+landed_path = source_path
+clean_dedup_index = dedup_index
+stage_cache_dir = cache_dir
+if sample:
+    source_path = "/Users/akash/Projects/BITS/DMML/Customer Churn Prediction/Dataset/Sample Data"
+    staging_path, output_path, report_path, model_dir, artifacts_dir = (
+        os.path.join(path, "Sample") for path in (staging_path, output_path, report_path, model_dir, artifacts_dir))
+    data_path = os.path.join(output_path, "processed_data.parquet")
+    # The sample is redrawn in place, so cleaning falls back to drop_duplicates instead of the latest-wins index
+    clean_dedup_index = None
+    stage_cache_dir = os.path.join(cache_dir, "Sample")
+
+
+def partition_args(source_path):
+    # One op_args list per landed date/format partition, expanded into one mapped task each
+    return [[partition] for partition in list_partitions(source_path)]
+
+
+def clean_partition_cached(partition_path, staging_path, config, cache_dir, dedup_index=None):
+    # Re-clean a partition only when its files or the config changed; always hand on the staged path.
+    # A skipped partition keeps its dedup index entries, delete the cache together with the index.
+    staged_path = staged_partition_path(partition_path, staging_path)
+    stage = "clean_" + os.path.splitext(os.path.basename(staged_path))[0]
+    run_cached(stage, clean_partition, args=(partition_path, staging_path, config),
+               kwargs={"dedup_index": dedup_index}, inputs=[partition_path],
+               stage_params={"config": config, "dedup_index": dedup_index}, outputs=[staged_path],
+               cache_dir=cache_dir)
+    return staged_path
+
+
 ################
 # Pipeline Dag #
 ################
@@ -43,30 +104,100 @@ with (DAG(dag_id="customer-churn-prediction-training",
 
     start = EmptyOperator(task_id="start")
 
+    # Skipped when the source CSV is unchanged since the last ingestion
     csv_ingestion = PythonOperator(
-        python_callable=ingest_csv,
-        op_args=(csv_path, raw_path),
+        python_callable=run_cached,
+        op_kwargs=dict(stage="ingest_csv", func=ingest_csv, args=(csv_path, raw_path),
+                       kwargs={"dedup_index": dedup_index},
+                       inputs=[csv_path], outputs=[raw_path, landed_path], cache_dir=cache_dir),
         task_id="ingest_csv"
     )
 
+    # The API can only be fingerprinted by fetching it, so this stage always runs; rows it landed
+    # before are skipped through the dedup index
     api_ingestion = PythonOperator(
         python_callable=ingest_api,
         op_args=(api_url, API_HEADERS, raw_path),
+        op_kwargs={"dedup_index": dedup_index},
         task_id="ingest_api"
     )
 
+    # Deviation of the sample from the full-data statistics is written to <source_path>/sample_report.json
+    sampling = PythonOperator(
+        python_callable=run_cached,
+        op_kwargs=dict(stage="sample", func=sample_partitions, args=(landed_path, source_path, sample["size"], conf),
+                       kwargs={"seed": sample.get("seed", 42)}, inputs=[landed_path],
+                       stage_params={"sample": sample, "config": conf}, outputs=[source_path],
+                       cache_dir=stage_cache_dir),
+        task_id="sample"
+    ) if sample else None
+
+    partitions = PythonOperator(
+        python_callable=partition_args,
+        op_args=(source_path,),
+        task_id="list_partitions"
+    )
+
+    # Map: one validation and one cleaning task per partition, run in parallel across workers
+    validate = PythonOperator.partial(
+        python_callable=validate_partition,
+        op_kwargs={"config": validation_config, "report_path": report_path},
+        task_id="validate_partition"
+    ).expand(op_args=partitions.output)
+
+    clean_partitions = PythonOperator.partial(
+        python_callable=clean_partition_cached,
+        op_kwargs={"staging_path": staging_path, "config": conf, "cache_dir": stage_cache_dir,
+                   "dedup_index": clean_dedup_index},
+        task_id="clean_partition"
+    ).expand(op_args=partitions.output)
+
+    # Reduce: merge validation statistics, and merge the staged partitions before imputation and scaling
+    validation_report = PythonOperator(
+        python_callable=merge_reports,
+        op_args=(validate.output, report_path),
+        task_id="merge_validation"
+    )
+
+    # Skipped when no staged partition and no cleaning option changed
     clean = PythonOperator(
-        python_callable=process,
-        op_args=(source_path, output_path, conf),
+        python_callable=run_cached,
+        op_kwargs=dict(stage="clean", func=merge_partitions, args=(clean_partitions.output, output_path, conf),
+                       kwargs={"dedup_index": clean_dedup_index},
+                       inputs=[staging_path],
+                       stage_params={"config": conf, "dedup_index": clean_dedup_index},
+                       outputs=[os.path.join(output_path, name) for name in
+                                ("processed_data.parquet", "data.parquet", "config.json", "scale_mapping.json")],
+                       cache_dir=stage_cache_dir),
         task_id="clean"
     )
 
+    # Skipped when the training data and training parameters are unchanged
     train = PythonOperator(
-        python_callable=train_model,
-        op_args=(data_path, label_column, drop_columns, model_dir, artifacts_dir),
+        python_callable=run_cached,
+        op_kwargs=dict(stage="train", func=train_model,
+                       args=(data_path, label_column, drop_columns, model_dir, artifacts_dir),
+                       inputs=[data_path],
+                       stage_params={"label_column": label_column, "drop_columns": drop_columns},
+                       outputs=[os.path.join(model_dir, "logistic_regression_model.pkl"),
+                                os.path.join(artifacts_dir, "performance_report.json")],
+                       cache_dir=stage_cache_dir),
         task_id="train"
     )
 
+    # Merges the stage metrics files of this run into run.json, also after a failed stage
+    metrics = PythonOperator(
+        python_callable=merge_metrics,
+        trigger_rule="all_done",
+        task_id="merge_metrics"
+    )
+
     stop = EmptyOperator(task_id="stop")
 
-    start >> [api_ingestion, csv_ingestion] >> clean >> train >> stop
+    if sampling:
+        start >> [api_ingestion, csv_ingestion] >> sampling >> partitions
+    else:
+        start >> [api_ingestion, csv_ingestion] >> partitions
+    partitions >> validate >> validation_report
+    partitions >> clean_partitions >> clean
+    [validation_report, clean] >> train >> metrics >> stop
@@ -0,0 +1,108 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+
+class Output:
+    def __init__(self, stage:str):
+        """
+        Placeholder for the return value of an upstream stage, resolved when the stage runs.
+
+        :param stage: Name of the upstream stage
+        """
+        self.stage = stage
+
+
+class LocalRunner:
+    def __init__(self, max_workers:int=4):
+        """
+        Runs pipeline callables in-process as a dependency graph, without a scheduler.
+
+        Stages whose upstream stages are done run concurrently on a thread pool, so independent
+        branches (e.g. CSV and API ingestion) overlap. Return values are passed in memory to stages
+        that reference them with Output(<stage>).
+
+        :param max_workers: Maximum number of stages running at the same time
+        """
+        self.max_workers = max_workers
+        self.stages = {}
+        self.results = {}
+        self.timings = {}
+
+    def add(self, name:str, func, args=(), kwargs:dict=None, upstream=()):
+        """
+        Register a stage.
+
+        :param name: Stage name
+        :param func: Stage callable
+        :param args: Positional arguments, Output placeholders are replaced with upstream results
+        :param kwargs: Keyword arguments, Output placeholders are replaced with upstream results
+        :param upstream: Names of stages that have to finish first (stages referenced by Output are added)
+        """
+        kwargs = kwargs or {}
+        references = {value.stage for value in list(args) + list(kwargs.values()) if isinstance(value, Output)}
+        self.stages[name] = {
+            "func": func,
+            "args": args,
+            "kwargs": kwargs,
+            "upstream": set(upstream) | references
+        }
+        return self
+
+    def __resolve(self, value):
+        return self.results[value.stage] if isinstance(value, Output) else value
+
+    def __run_stage(self, name:str, start:float):
+        stage = self.stages[name]
+        args = [self.__resolve(value) for value in stage["args"]]
+        kwargs = {key: self.__resolve(value) for key, value in stage["kwargs"].items()}
+        logger.info(f"Starting stage '{name}'")
+        began = time.perf_counter()
+        result = stage["func"](*args, **kwargs)
+        ended = time.perf_counter()
+        self.timings[name] = {"start": began - start, "end": ended - start, "duration": ended - began}
+        logger.info(f"Stage '{name}' finished in {ended - began:.2f}s")
+        return result
+
+    def run(self):
+        """
+        Execute every stage once its upstream stages are done. Stops scheduling new stages after
+        the first failure and re-raises it.
+
+        :return: Dict of stage name -> return value
+        """
+        for name, stage in self.stages.items():
+            missing = stage["upstream"] - set(self.stages)
+            if missing:
+                raise ValueError(f"Stage '{name}' depends on unknown stages {sorted(missing)}")
+
+        start = time.perf_counter()
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = [name for name, stage in pending.items() if stage["upstream"] <= set(self.results)]
+                if not ready and not running:
+                    raise ValueError(f"Dependency cycle between stages {sorted(pending)}")
+                for name in ready:
+                    running[executor.submit(self.__run_stage, name, start)] = name
+                    del pending[name]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    # Raises the stage's exception; the executor waits for stages already running
+                    self.results[name] = future.result()
+        self.timings["total"] = {"start": 0.0, "end": time.perf_counter() - start,
+                                 "duration": time.perf_counter() - start}
+        return self.results
+
+    def report(self):
+        """
+        Print the per-stage timing breakdown of the last run and return it.
+        """
+        print(f"{'stage':<20}{'start (s)':>12}{'end (s)':>12}{'duration (s)':>15}")
+        for name, timing in sorted(self.timings.items(), key=lambda item: (item[0] == "total", item[1]["start"])):
+            print(f"{name:<20}{timing['start']:>12.2f}{timing['end']:>12.2f}{timing['duration']:>15.2f}")
+        return self.timings
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class StageCache:
+    def __init__(self, cache_dir:str):
+        """
+        Stage-level memoization for the training pipeline.
+
+        Every stage run is fingerprinted from the content of its input files and its parameters. The
+        fingerprint is recorded in <cache_dir>/<stage>.json together with the hashes of the outputs the
+        run produced; a later run with the same fingerprint and untouched outputs is skipped.
+
+        :param cache_dir: Directory holding the stage manifests and the file hash cache
+        """
+        self.cache_dir = cache_dir
+        self.hash_cache_path = os.path.join(cache_dir, "file_hashes.json")
+        self.__hash_cache = None
+
+    def __load_hash_cache(self):
+        if self.__hash_cache is None:
+            self.__hash_cache = {}
+            if os.path.exists(self.hash_cache_path):
+                with open(self.hash_cache_path) as f:
+                    self.__hash_cache = json.load(f)
+        return self.__hash_cache
+
+    def __save_json(self, path, content):
+        # Write to a temporary file first so a crashed run never leaves a truncated manifest.
+        # The pid keeps concurrent (mapped) tasks from writing to the same temporary file.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(content, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def hash_file(self, path:str):
+        """
+        Content hash of a file. Hashes are cached by (size, mtime) so unchanged partitions are not re-read.
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.__load_hash_cache().get(key)
+        if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime_ns:
+            return cached["hash"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        self.__hash_cache[key] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def hash_path(self, path:str):
+        """
+        Content hash of a file, or of every file below a directory (relative paths included).
+        Missing paths hash to None.
+        """
+        if not os.path.exists(path):
+            return None
+        if os.path.isfile(path):
+            return self.hash_file(path)
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(self.hash_file(file_path).encode())
+        return digest.hexdigest()
+
+    def fingerprint(self, inputs:list, params=None):
+        """
+        Fingerprint of a stage run from its input paths and JSON-serializable parameters.
+        """
+        digest = hashlib.sha256()
+        for path in inputs:
+            digest.update(f"{path}={self.hash_path(path)}".encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def __output_hashes(self, outputs:list):
+        # Only files are compared by content; directories just have to exist
+        return {path: self.hash_path(path) if os.path.isfile(path) else os.path.isdir(path) for path in outputs}
+
+    def is_fresh(self, stage:str, fingerprint:str, outputs:list):
+        manifest_path = os.path.join(self.cache_dir, f"{stage}.json")
+        if not os.path.exists(manifest_path):
+            return False
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        return manifest["fingerprint"] == fingerprint and manifest["outputs"] == self.__output_hashes(outputs)
+
+    def record(self, stage:str, fingerprint:str, outputs:list):
+        self.__save_json(os.path.join(self.cache_dir, f"{stage}.json"), {
+            "stage": stage,
+            "fingerprint": fingerprint,
+            "outputs": self.__output_hashes(outputs),
+            "completed_at": datetime.now().isoformat()
+        })
+        self.__save_json(self.hash_cache_path, self.__load_hash_cache())
+
+
+def run_cached(stage:str, func, args=(), inputs:list=(), outputs:list=(), stage_params=None,
+               cache_dir:str=None, kwargs=None):
+    """
+    Run a pipeline stage unless nothing it depends on changed since its last successful run.
+
+    :param stage: Stage name, used as the manifest name
+    :param func: Stage callable
+    :param args: Positional arguments of the stage callable
+    :param inputs: Files or directories the stage reads
+    :param outputs: Files or directories the stage produces
+    :param stage_params: Stage parameters (config, labels, ...) that are part of the fingerprint. Not named
+                         params: Airflow passes its DAG params to a callable argument of that name
+    :param cache_dir: Directory of the stage manifests
+    :param kwargs: Keyword arguments of the stage callable
+    :return: The stage result, or None when the stage was skipped
+    """
+    cache = StageCache(cache_dir)
+    fingerprint = cache.fingerprint(list(inputs), stage_params)
+    if cache.is_fresh(stage, fingerprint, list(outputs)):
+        logger.info(f"Stage '{stage}' is up to date (fingerprint {fingerprint[:12]}), reusing previous outputs")
+        return None
+    logger.info(f"Running stage '{stage}' (fingerprint {fingerprint[:12]})")
+    result = func(*args, **(kwargs or {}))
+    cache.record(stage, fingerprint, list(outputs))
+    return result
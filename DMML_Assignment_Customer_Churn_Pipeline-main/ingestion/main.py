@@ -1,7 +1,12 @@
 
+import json
+import os
+import pandas as pd
 from ingestion.utils.ingestion import APIDataIngestion, CSVDataIngestion
 from ingestion.utils.logger import logger
 from ingestion.utils.storage import DataStorage
+from common.utils.dedup import DedupIndex
+from common.utils.instrumentation import stage
 
 # Source paths
 csv_path = \
@@ -17,21 +22,63 @@ storage_path = \
 
 API_HEADERS = {"X-API-Key": "2a258740"}
 
-storage = DataStorage(name="Customer Churn Data", storage_root=storage_path)
+def get_storage(storage_root=None):
+    # Built on use so importing this module has no side effects; defaults to the configured storage_path
+    return DataStorage(name="Customer Churn Data", storage_root=storage_root or storage_path)
 
-def ingest_api(api_url, headers, output_dir ):
-    logger.info("Starting ingestion")
-    _, file = APIDataIngestion.ingest(api_url, output_dir=output_dir, headers=headers)
-    logger.info("ingestion Complete")
+def new_rows(data, file, dedup_index=None):
+    """
+    Keep only the rows the dedup index has not seen yet. The raw file in output_dir stays complete, the new
+    rows are written to <output_dir>/new_rows/ under the same name so DataStorage lands them as usual.
+
+    :param data: Ingested records (DataFrame or list of JSON records)
+    :param file: Raw file written by the ingestion
+    :param dedup_index: Dedup index file, None lands every row
+    :return: (file to land or None when every row was landed before, DataFrame of the rows to land)
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    if dedup_index is None:
+        return file, df
+    mask = DedupIndex(dedup_index).unseen(df)
+    logger.info(f"{int(mask.sum())} of {len(df)} ingested rows are new")
+    if not mask.any():
+        return None, df[mask]
+    if mask.all():
+        return file, df
+    path = os.path.join(os.path.dirname(file), "new_rows", os.path.basename(file))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if file.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump([record for record, keep in zip(data, mask) if keep], f)
+    else:
+        df[mask].to_csv(path, index=False)
+    return path, df[mask]
+
+def land(data, file, storage_root=None, dedup_index=None):
     logger.info("Starting Data Segregation")
-    storage.store(file)
+    file, rows = new_rows(data, file, dedup_index)
+    if file is None:
+        logger.info("No new rows, nothing landed")
+        return
+    path = get_storage(storage_root).store(file)
+    # Recorded only once the rows are landed, a failed store is retried on the next run. The landing time
+    # decides which record of a customer is the latest one during cleaning.
+    if dedup_index:
+        index = DedupIndex(dedup_index)
+        index.add(rows)
+        index.record_file(path)
     logger.info("Data Segregation complete")
 
-def ingest_csv(csv_path, output_dir ):
+@stage("ingest_api")
+def ingest_api(api_url, headers, output_dir, storage_root=None, dedup_index=None):
     logger.info("Starting ingestion")
-    _, file = CSVDataIngestion.ingest(csv_path, output_dir)
+    data, file = APIDataIngestion.ingest(api_url, output_dir=output_dir, headers=headers)
     logger.info("ingestion Complete")
-    logger.info("Starting Data Segregation")
-    storage.store(file)
-    logger.info("Data Segregation complete")
+    land(data, file, storage_root, dedup_index)
 
+@stage("ingest_csv")
+def ingest_csv(csv_path, output_dir, storage_root=None, dedup_index=None):
+    logger.info("Starting ingestion")
+    data, file = CSVDataIngestion.ingest(csv_path, output_dir)
+    logger.info("ingestion Complete")
+    land(data, file, storage_root, dedup_index)
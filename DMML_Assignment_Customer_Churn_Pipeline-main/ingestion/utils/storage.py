@@ -1,20 +1,36 @@
 import os.path
-import shutil
 from .logger import logger
+from common.utils.instrumentation import timed
+from common.utils.raw import compress_file, default_codec
 
 class DataStorage:
-    def __init__(self, name:str, storage_root:str):
+    def __init__(self, name:str, storage_root:str, compression:str="auto"):
+        """
+        :param name: Dataset name, the folder holding the date/format partitions
+        :param storage_root: Root folder of the datasets
+        :param compression: Codec of new partitions: "zstd", "gzip", "auto" (zstd when installed, else gzip)
+                            or None to store files uncompressed
+        """
         self.name = name
         self.storage_root = storage_root
+        self.compression = compression
 
+    def codec(self):
+        # New files always use the configured codec, also in partitions that already hold files landed
+        # uncompressed or with another codec: readers (open_raw) pick the codec per file from its extension
+        return default_codec() if self.compression == "auto" else self.compression
+
+    @timed("DataStorage.store")
     def store(self, source:str):
         source_filename = source.split('/')[-1]
         filename, date_ext = source_filename.split('__')
         date, ext = date_ext.split('.')
         output_path = os.path.join(self.storage_root, self.name, date, ext.upper())
-        if not os.path.exists(output_path):
-            os.makedirs(output_path)
+        codec = self.codec()
+        os.makedirs(output_path, exist_ok=True)
         filename = f'{filename}.{ext}'
-        output_path = os.path.join(output_path, filename)
-        shutil.copy(source, output_path)
-        logger.info(f"Raw file copied from Path: {source} to Path: {output_path}")
\ No newline at end of file
+        # The codec is recorded in the file name, e.g. <uuid>.csv.zst
+        output_path = compress_file(source, os.path.join(output_path, filename), codec)
+        logger.info(f"Raw file copied from Path: {source} to Path: {output_path} "
+                    f"({os.path.getsize(source)} -> {os.path.getsize(output_path)} bytes, {codec or 'uncompressed'})")
+        return output_path
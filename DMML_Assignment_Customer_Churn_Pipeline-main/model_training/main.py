@@ -1,8 +1,11 @@
 from model_training.model import Model
+from common.utils.instrumentation import stage
 
-def train_model(data_path, label_column, drop_columns, model_dir, artifacts_dir):
+@stage("train")
+def train_model(data_path, label_column, drop_columns, model_dir, artifacts_dir, data=None):
     xtrain, xtest, ytrain, ytest = Model.load_data(data_path=data_path,
-                                                   label_column=label_column, drop_columns=drop_columns)
+                                                   label_column=label_column, drop_columns=drop_columns,
+                                                   data=data)
     model, report = Model.train(xtrain, xtest, ytrain, ytest)
     Model.save_model(model_dir=model_dir,
                      artifacts_dir=artifacts_dir,
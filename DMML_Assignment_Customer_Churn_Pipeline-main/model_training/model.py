@@ -1,5 +1,6 @@
 import json
 import os
+import numpy as np
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
@@ -7,12 +8,18 @@ from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score, classification_report
 )
 import joblib
+from common.utils.handoff import read_table
+from common.utils.instrumentation import timed
 
 class Model:
     @staticmethod
-    def load_data(data_path:str, label_column:str, drop_columns:list):
+    @timed("Model.load_data")
+    def load_data(data_path:str, label_column:str, drop_columns:list, data:pd.DataFrame=None):
 
-        data = pd.read_csv(data_path)
+        # Parquet is the hand-off format from cleaning, CSV exports are still accepted.
+        # In-process callers can pass the cleaned DataFrame directly.
+        if data is None:
+            data = read_table(data_path)
         print("Data preview:")
         print(data.head())
         X = data.drop(columns=drop_columns)
@@ -24,6 +31,7 @@ class Model:
         return X_train, X_test, y_train, y_test
 
     @staticmethod
+    @timed("Model.train")
     def train(X_train, X_test, y_train, y_test):
 
         model = LogisticRegression(max_iter=1000, random_state=42)
@@ -38,6 +46,7 @@ class Model:
         return model, {"accuracy":accuracy, "precision":precision, "recall":recall, "f1":f1, "report":report}
 
     @staticmethod
+    @timed("Model.save_model")
     def save_model(model_dir:str, artifacts_dir, model, report):
         os.makedirs(model_dir, exist_ok=True)
         os.makedirs(artifacts_dir, exist_ok=True)
@@ -51,5 +60,14 @@ class Model:
             json.dump(report, file)
         print(f"Performance report saved to {report_filename}")
 
+    @staticmethod
+    def score_vectors(model, vectors):
+        """
+        Churn probability for model-ready feature vectors (already encoded and scaled), computed as a
+        dot product with the logistic regression coefficients instead of going through preprocessing.
 
-
+        :param model: Fitted LogisticRegression
+        :param vectors: 2-D array with one row per customer, in training column order
+        """
+        logits = np.asarray(vectors, dtype=np.float64) @ model.coef_[0] + model.intercept_[0]
+        return 1.0 / (1.0 + np.exp(-logits))
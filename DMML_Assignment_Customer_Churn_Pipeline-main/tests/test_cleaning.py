@@ -0,0 +1,14 @@
+import json
+import pandas as pd
+from cleaning.main import clean_partition, conf, merge_partitions
+
+
+def test_merge_with_dedup_index_keeps_the_saved_config(tmp_path):
+    partition = tmp_path / "landed" / "20250101" / "CSV"
+    partition.mkdir(parents=True)
+    pd.read_csv("Dataset/Telco-Customer-Churn.csv").head(50).to_csv(partition / "telco.csv", index=False)
+    index = str(tmp_path / "index.sqlite")
+    staged = clean_partition(str(partition), str(tmp_path / "staging"), conf, dedup_index=index)
+    merge_partitions([staged], str(tmp_path / "out"), conf, dedup_index=index)
+    with open(tmp_path / "out" / "config.json") as f:
+        assert json.load(f) == conf
@@ -0,0 +1,27 @@
+import json
+import pandas as pd
+from common.utils.dedup import DedupIndex
+
+
+def test_csv_and_api_records_hash_the_same(tmp_path):
+    # The CSV source parses MonthlyCharges as the float 20.0, the API sends "20"
+    csv_path = tmp_path / "telco.csv"
+    csv_path.write_text("customerID,SeniorCitizen,MonthlyCharges,TotalCharges\n"
+                        "0001-A,0,20.0,144\n"
+                        "0002-B,1,20.5,\n")
+    csv_rows = pd.read_csv(csv_path)
+    api_rows = pd.DataFrame(json.loads('[{"customerID": "0001-A", "SeniorCitizen": "0", "MonthlyCharges": "20", '
+                                       '"TotalCharges": "144.0"}]'))
+    assert csv_rows["MonthlyCharges"].dtype == float
+
+    index = DedupIndex(str(tmp_path / "index.sqlite"))
+    index.add(csv_rows)
+    assert DedupIndex.row_hashes(csv_rows)[0] == DedupIndex.row_hashes(api_rows)[0]
+    assert not index.unseen(api_rows).any()
+
+
+def test_changed_record_is_unseen(tmp_path):
+    rows = pd.DataFrame({"customerID": ["0001-A"], "MonthlyCharges": [20.0]})
+    index = DedupIndex(str(tmp_path / "index.sqlite"))
+    index.add(rows)
+    assert index.unseen(rows.assign(MonthlyCharges=20.5)).all()
@@ -0,0 +1,12 @@
+import pytest
+from benchmarks.import_time import IMPORT_CHECKS, probe
+
+
+# Import time is compared with a baseline by benchmarks/import_time.py; this only checks side effects
+@pytest.mark.parametrize("module", sorted(IMPORT_CHECKS))
+def test_import_has_no_side_effects(module):
+    result = probe(module, IMPORT_CHECKS[module])
+    assert result["error"] is None
+    assert result["files"] == [], "files or folders created on import"
+    assert result["threads"] == [], "threads started on import"
+    assert result["loaded"] == [], "heavy modules loaded on import"
@@ -0,0 +1,35 @@
+import json
+import pandas as pd
+from cleaning.main import conf
+from common.utils.sampling import sample_partitions
+
+
+def land(root, date, name, df):
+    partition = root / date / "CSV"
+    partition.mkdir(parents=True, exist_ok=True)
+    df.to_csv(partition / name, index=False)
+
+
+def test_sample_does_not_depend_on_chunk_size(tmp_path):
+    # The Telco CSV has blank TotalCharges in a few rows only, so read_csv infers a different dtype per chunk
+    df = pd.read_csv("Dataset/Telco-Customer-Churn.csv")
+    landed = tmp_path / "landed"
+    land(landed, "20250101", "a.csv", df.iloc[:3000])
+    land(landed, "20250102", "b.csv", df.iloc[3000:])
+    samples = {}
+    for chunksize in (500, 10000):
+        sample_path = tmp_path / f"sample_{chunksize}"
+        report = sample_partitions(str(landed), str(sample_path), 1000, conf, seed=7, chunksize=chunksize)
+        samples[chunksize] = ((sample_path / "20250102" / "CSV" / "sample.csv").read_text(),
+                              json.dumps(report, sort_keys=True, default=str))
+    assert samples[500] == samples[10000]
+
+
+def test_sample_keeps_churn_proportions(tmp_path):
+    df = pd.read_csv("Dataset/Telco-Customer-Churn.csv")
+    land(tmp_path / "landed", "20250101", "a.csv", df)
+    report = sample_partitions(str(tmp_path / "landed"), str(tmp_path / "sample"), 1000, conf)
+    sample = pd.read_csv(tmp_path / "sample" / "20250101" / "CSV" / "sample.csv")
+    assert len(sample) == report["size"] == 1000
+    full = df["Churn"].value_counts(normalize=True)
+    assert (sample["Churn"].value_counts(normalize=True) - full).abs().max() < 0.002
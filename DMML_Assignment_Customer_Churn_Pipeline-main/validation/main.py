@@ -1,6 +1,9 @@
+import json
 import os
 import numpy as np
-from utils.validate import JSONDataValidator, CSVDataValidator
+from common.utils.instrumentation import stage
+from common.utils.partitions import list_partitions
+from validation.utils.validate import JSONDataValidator, CSVDataValidator
 source_path = "../Dataset/Customer Churn Data"
 report_path = "../reports/Customer Churn Data"
 
@@ -35,30 +38,62 @@ config = {
         'SeniorCitizen': (0, 1)  # SeniorCitizen should be 0 or 1
     }}
 
+@stage("validate")
 def validate(config, source_path, report_path):
-    csv_validator = CSVDataValidator(config=config)
-    json_validator = JSONDataValidator(config=config)
-    for folder in os.walk(source_path):
-        if 'CSV' in folder[0]:
-            source_type = "CSV"
-        elif 'JSON' in folder[0]:
-            source_type = 'JSON'
-        else:
-            continue
+    summaries = [validate_partition(partition, config, report_path) for partition in list_partitions(source_path)]
+    return merge_reports(summaries, report_path)
 
-        # Create folders
-        path = os.path.join(report_path, '/'.join(folder[0].split("/")[-2:]))
-        if not os.path.exists(path):
-            os.makedirs(path)
 
-        files = folder[-1]
-        for file in files:
-            if source_type == 'CSV':
-                validator = csv_validator
-            else:
-                validator = json_validator
-            validator.load(os.path.join(folder[0], file))
-            reports = validator.validate()
-            validator.generate_data_quality_report(reports, os.path.join(path, file.split('.')[0] + '.xlsx'))
+@stage("validate_partition")
+def validate_partition(partition_path, config, report_path):
+    """
+    Map step: validate every file of one date/format partition and write its quality reports.
 
+    Returns:
+    dict: Per-file statistics (rows, missing values, duplicates, dtype mismatches, out of range values).
+    """
+    source_type = os.path.basename(os.path.normpath(partition_path))
+    validator = CSVDataValidator(config=config) if source_type == 'CSV' else JSONDataValidator(config=config)
 
+    # Create folders
+    path = os.path.join(report_path, '/'.join(os.path.normpath(partition_path).split("/")[-2:]))
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    summary = {"partition": partition_path, "files": []}
+    for file in sorted(os.listdir(partition_path)):
+        validator.load(os.path.join(partition_path, file))
+        reports = validator.validate()
+        validator.generate_data_quality_report(reports, os.path.join(path, file.split('.')[0] + '.xlsx'))
+        summary["files"].append({
+            "file": file,
+            "rows": int(len(validator.data)),
+            "missing": {row.Column: int(row.MissingCount) for row in reports["MissingValues"].itertuples()},
+            "duplicates": int(reports["Duplicates"][0]),
+            "dtype_mismatches": reports["DataTypeValidation"].query("Status == 'Mismatch'")["Column"].tolist()
+            if len(reports["DataTypeValidation"]) else [],
+            "out_of_range": {row.Column: int(row.TotalOutOfRange) for row in reports["RangeValidation"].itertuples()}
+        })
+    return summary
+
+
+@stage("merge_validation")
+def merge_reports(summaries, report_path):
+    """
+    Reduce step: merge the per-partition statistics into validation_summary.json.
+    """
+    # Airflow hands mapped task outputs over lazily (LazyXComAccess), which json cannot serialize
+    summaries = list(summaries)
+    totals = {"partitions": len(summaries), "files": 0, "rows": 0, "duplicates": 0, "missing": {}, "out_of_range": {}}
+    for summary in summaries:
+        for file in summary["files"]:
+            totals["files"] += 1
+            totals["rows"] += file["rows"]
+            totals["duplicates"] += file["duplicates"]
+            for key in ("missing", "out_of_range"):
+                for col, count in file[key].items():
+                    totals[key][col] = totals[key].get(col, 0) + count
+    os.makedirs(report_path, exist_ok=True)
+    with open(os.path.join(report_path, "validation_summary.json"), "w") as f:
+        json.dump({"totals": totals, "partitions": summaries}, f, indent=2)
+    return totals
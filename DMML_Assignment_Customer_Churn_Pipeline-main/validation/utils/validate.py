@@ -1,9 +1,10 @@
-import json
 from abc import ABC, abstractmethod
 import pandas as pd
 from pandas import DataFrame
 import numpy as np
-from utils.logger import logger
+from validation.utils.logger import logger
+from common.utils.raw import read_raw
+from common.utils.instrumentation import timed
 
 class DataValidator:
     def __init__(self, config:dict):
@@ -18,6 +19,7 @@ class DataValidator:
     def load(self, **kwargs):
         return NotImplemented
 
+    @timed("DataValidator.validate")
     def validate(self):
         reports = {}
         logger.info("Checking for missing values")
@@ -67,6 +69,7 @@ class DataValidator:
         return report
 
     @staticmethod
+    @timed("DataValidator.check_missing_values")
     def check_missing_values(df):
         """Check for missing values in each column."""
         missing = df.isnull().sum()
@@ -75,13 +78,14 @@ class DataValidator:
         return missing_report
 
     @staticmethod
+    @timed("DataValidator.check_duplicates")
     def check_duplicates(df):
         """Identify duplicate rows in the dataframe."""
-        duplicate_count = df.duplicated().sum()
-        duplicates = df[df.duplicated()]
-        return duplicate_count, duplicates
+        duplicated = df.duplicated()
+        return duplicated.sum(), df[duplicated]
 
     @staticmethod
+    @timed("DataValidator.validate_data_types")
     def validate_data_types(df, expected_dtypes):
         """
         Validate data types based on expected_dtypes which is a dictionary
@@ -101,6 +105,7 @@ class DataValidator:
         return pd.DataFrame(dtype_report)
 
     @staticmethod
+    @timed("DataValidator.validate_ranges")
     def validate_ranges(df, range_checks):
         """
         Validate if the values in certain columns fall within the expected range.
@@ -141,9 +146,11 @@ class DataValidator:
 
 class CSVDataValidator(DataValidator):
 
+    @timed("CSVDataValidator.load")
     def load(self, source_path:str):
         try:
-            self.data = pd.read_csv(source_path)
+            # Compressed partitions (.csv.gz, .csv.zst) are decompressed as a stream
+            self.data = read_raw(source_path)
             logger.info(f"Data loaded successfully from {source_path}.")
             return self.data
         except Exception as e:
@@ -151,11 +158,10 @@ class CSVDataValidator(DataValidator):
             return None
 
 class JSONDataValidator(DataValidator):
+    @timed("JSONDataValidator.load")
     def load(self, source_path):
         try:
-            with open(source_path, 'r') as f:
-                json_data = json.load(f)
-            self.data = pd.DataFrame(json_data)
+            self.data = read_raw(source_path)
             logger.info(f"Data loaded successfully from {source_path}.")
             return self.data
         except Exception as e: